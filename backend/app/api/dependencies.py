@@ -14,6 +14,7 @@ from app.services.scheduler import StrategySchedulerService
 from app.services.strategy_dispatcher import StrategyDispatcher
 from app.services.strategies import StrategyService
 from app.services.users import UserService
+from app.services.webhook import get_webhook_service
 
 
 def get_user_service(session: Session = Depends(get_db)) -> Generator[UserService, None, None]:
@@ -2,7 +2,7 @@
 
 from typing import Optional
 
-from fastapi import APIRouter, Body, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
 
 from app.api.dependencies import get_current_user, get_rms_service
 from app.models.user import User
@@ -39,11 +39,12 @@ def update_rms_config(
 
 @router.get("/status", response_model=RmsStatusRead)
 def rms_status(
+    detailed: bool = Query(default=True, description="Include automation recommendation messages"),
     rms_service: RmsService = Depends(get_rms_service),
     current_user: Optional[User] = Depends(get_current_user),
 ) -> RmsStatusRead:
     user = _require_user(current_user)
-    return rms_service.get_status(user.id)
+    return rms_service.get_status(user.id, detailed=detailed)
 
 
 @router.post("/squareoff", response_model=RmsSquareOffResponse)
@@ -3,7 +3,7 @@ from __future__ import annotations
 from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from fastapi.responses import Response
 
 from app.api.dependencies import (
@@ -63,15 +63,17 @@ def delete_job(
 @router.post("/jobs/{job_id}/trigger", status_code=status.HTTP_202_ACCEPTED)
 def trigger_job(
     job_id: UUID,
+    background_tasks: BackgroundTasks,
     current_user: Optional[User] = Depends(get_current_user),
     scheduler: StrategySchedulerService = Depends(get_scheduler_service),
     dispatcher: StrategyDispatcher = Depends(get_strategy_dispatcher),
 ) -> dict[str, str]:
     user = _require_user(current_user)
     try:
-        job = scheduler.trigger_job(user.id, job_id)
+        job, pending = scheduler.stage_trigger(user.id, job_id)
     except KeyError:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    background_tasks.add_task(pending.publish, reraise=False)
 
     dispatcher.dispatch(
         user_id=user.id,
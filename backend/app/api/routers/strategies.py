@@ -122,11 +122,12 @@ def stop_strategy(
 def strategy_logs(
     strategy_id: UUID,
     limit: int = Query(default=100, ge=1, le=500),
+    context: bool = Query(default=True, description="Include each log entry's JSON context"),
     strategy_service: StrategyService = Depends(get_strategy_service),
     current_user: Optional[User] = Depends(get_current_user),
 ) -> StrategyLogListResponse:
     user = _require_user(current_user)
-    return strategy_service.get_logs(user.id, strategy_id, limit=limit)
+    return strategy_service.get_logs(user.id, strategy_id, limit=limit, include_context=context)
 
 
 @router.get("/{strategy_id}/pnl", response_model=StrategyPerformanceResponse)
@@ -7,11 +7,11 @@ from uuid import UUID
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from fastapi.responses import Response
 
-from app.api.dependencies import get_current_user, get_scheduler_service
+from app.api.dependencies import get_current_user, get_scheduler_service, get_webhook_service
 from app.models.user import User
 from app.schemas.webhook import WebhookConnectorCreate, WebhookConnectorRead, WebhookEventIn
 from app.services.scheduler import StrategySchedulerService
-from app.services.webhook import webhook_service
+from app.services.webhook import WebhookService
 
 router = APIRouter(prefix="/webhooks", tags=["Webhooks"])
 
@@ -23,7 +23,10 @@ def _require_user(current_user: Optional[User]) -> User:
 
 
 @router.get("/connectors", response_model=list[WebhookConnectorRead])
-def list_connectors(current_user: Optional[User] = Depends(get_current_user)) -> list[WebhookConnectorRead]:
+def list_connectors(
+    current_user: Optional[User] = Depends(get_current_user),
+    webhook_service: WebhookService = Depends(get_webhook_service),
+) -> list[WebhookConnectorRead]:
     user = _require_user(current_user)
     return webhook_service.list_connectors(user.id)
 
@@ -32,6 +35,7 @@ def list_connectors(current_user: Optional[User] = Depends(get_current_user)) ->
 def create_connector(
     payload: WebhookConnectorCreate,
     current_user: Optional[User] = Depends(get_current_user),
+    webhook_service: WebhookService = Depends(get_webhook_service),
 ) -> WebhookConnectorRead:
     user = _require_user(current_user)
     return webhook_service.create_connector(user.id, payload)
@@ -41,6 +45,7 @@ def create_connector(
 def delete_connector(
     connector_id: UUID,
     current_user: Optional[User] = Depends(get_current_user),
+    webhook_service: WebhookService = Depends(get_webhook_service),
 ) -> Response:
     user = _require_user(current_user)
     success = webhook_service.delete_connector(user.id, connector_id)
@@ -55,6 +60,7 @@ def ingest_event(
     event: WebhookEventIn,
     background_tasks: BackgroundTasks,
     scheduler: StrategySchedulerService = Depends(get_scheduler_service),
+    webhook_service: WebhookService = Depends(get_webhook_service),
 ) -> dict[str, str]:
     try:
         connector = webhook_service.dispatch_event(connector_id, event, background_tasks)
@@ -71,11 +77,12 @@ def ingest_event(
         except ValueError:
             strategy_uuid = None
 
-    scheduled_job = scheduler.enqueue_webhook_job(
+    scheduled_job, pending = scheduler.stage_webhook_job(
         user_id=connector.user_id,
         provider=connector.provider.value,
         strategy_id=strategy_uuid,
         context=event.payload,
     )
+    background_tasks.add_task(pending.publish, reraise=False)
 
     return {"status": "accepted", "job_id": str(scheduled_job.id)}
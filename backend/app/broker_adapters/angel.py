@@ -21,6 +21,10 @@ from .base import (
     OrderResult,
 )
 
+# Shared across adapter instances so repeat calls reuse pooled keep-alive connections
+# instead of paying a TCP/TLS handshake per request.
+_HTTP_CLIENT = httpx.Client(limits=httpx.Limits(max_connections=50, max_keepalive_connections=20))
+
 
 class AngelAdapter(BaseBrokerAdapter):
     """Angel One SmartAPI adapter supporting session login and basic order flow."""
@@ -774,7 +778,7 @@ class AngelAdapter(BaseBrokerAdapter):
         headers = self._base_headers(api_key=api_key, client_code=client_code, jwt_token=jwt_token)
 
         try:
-            response = httpx.request(
+            response = _HTTP_CLIENT.request(
                 method,
                 f"{self.base_url}{path}",
                 headers=headers,
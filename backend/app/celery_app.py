@@ -17,7 +17,11 @@ celery_app = Celery(
 
 celery_app.conf.update(
     task_default_queue="strategy",
+    task_routes={"strategy.*": {"queue": "strategy"}},
     task_acks_late=True,
+    # Reserve one task per process so a long live/backtest run cannot hold
+    # queued runs hostage while sibling processes sit idle (pair with -O fair).
+    worker_prefetch_multiplier=1,
     task_serializer="json",
     result_serializer="json",
     accept_content=["json"],
@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Literal
 from pydantic import Field
 from pydantic_settings import BaseSettings
 
@@ -27,6 +28,8 @@ class Settings(BaseSettings):
     redis_url: str = Field(default="redis://localhost:6379/0")
     celery_broker_url: str | None = None
     celery_result_backend: str | None = None
+    webhook_connector_ttl_seconds: int | None = None
+    webhook_connector_store: Literal["redis", "memory"] = "redis"
 
     class Config:
         env_file = ".env"
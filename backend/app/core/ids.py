@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+import uuid
+
+_RAND_BITS = 74
+_lock = threading.Lock()
+_last: tuple[int, int] = (0, 0)
+
+
+def uuid7() -> uuid.UUID:
+    """Return an RFC 9562 version 7 UUID: 48-bit Unix milliseconds followed by 74 random bits.
+
+    Ids generated later sort after earlier ones, so inserts into append-heavy tables land on the
+    right-hand edge of their primary key index instead of random leaf pages. Within one process
+    the ordering is strict: ids minted in the same millisecond increment the previous random bits
+    (RFC 9562 section 6.2, method 2), so they also break ties between equal timestamps.
+    """
+    global _last
+    with _lock:
+        timestamp_ms = time.time_ns() // 1_000_000
+        rand = int.from_bytes(os.urandom(10), "big") >> (80 - _RAND_BITS)
+        last_ms, last_rand = _last
+        if timestamp_ms <= last_ms:
+            timestamp_ms, rand = last_ms, last_rand + 1
+            if rand >> _RAND_BITS:
+                timestamp_ms, rand = last_ms + 1, 0
+        _last = (timestamp_ms, rand)
+    value = (timestamp_ms & 0xFFFF_FFFF_FFFF) << 80
+    value |= 0x7 << 76  # version
+    value |= (rand >> 62) << 64  # rand_a
+    value |= 0b10 << 62  # RFC 4122 variant
+    value |= rand & 0x3FFF_FFFF_FFFF_FFFF  # rand_b
+    return uuid.UUID(int=value)
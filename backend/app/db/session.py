@@ -1,12 +1,23 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, make_url
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
 
+
+def _pool_options(database_url: str) -> dict[str, bool]:
+    # In-memory SQLite uses SingletonThreadPool, which has no LIFO mode.
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+    # LIFO checkout keeps reusing the few warm connections and lets idle ones age out.
+    return {"pool_use_lifo": True}
+
+
 engine = create_engine(
     settings.database_url,
     future=True,
     echo=settings.sqlalchemy_echo,
+    **_pool_options(settings.database_url),
 )
 
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
@@ -0,0 +1,5 @@
+from sqlalchemy import JSON
+from sqlalchemy.dialects.postgresql import JSONB
+
+# Stored as binary jsonb on PostgreSQL so key extraction skips re-parsing the text; plain JSON elsewhere.
+JSONDocument = JSON().with_variant(JSONB(), "postgresql")
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Mapping
+
+from sqlalchemy import Table, and_, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+_DIALECT_INSERTS = {"postgresql": postgresql_insert, "sqlite": sqlite_insert}
+
+
+def increment_or_insert(
+    bind: Session | Connection,
+    table: Table,
+    key_values: Mapping[str, Any],
+    deltas: Mapping[str, Any],
+) -> None:
+    """Add ``deltas`` to the row identified by ``key_values``, inserting it with those values when absent.
+
+    ``key_values`` must cover the table's primary key; ``updated_at`` is stamped on every write.
+    """
+    dialect = bind.get_bind().dialect if isinstance(bind, Session) else bind.dialect
+    now = datetime.utcnow()
+    insert = _DIALECT_INSERTS.get(dialect.name)
+    if insert is None:
+        _increment_or_insert_portable(bind, table, key_values, deltas, now)
+        return
+    stmt = insert(table).values(**key_values, **deltas, updated_at=now)
+    set_ = {name: table.c[name] + stmt.excluded[name] for name in deltas}
+    set_["updated_at"] = stmt.excluded.updated_at
+    stmt = stmt.on_conflict_do_update(index_elements=[table.c[name] for name in key_values], set_=set_)
+    bind.execute(stmt)
+
+
+def _increment_or_insert_portable(
+    bind: Session | Connection,
+    table: Table,
+    key_values: Mapping[str, Any],
+    deltas: Mapping[str, Any],
+    now: datetime,
+) -> None:
+    # Backends without ON CONFLICT support: update the existing row, insert when there is none.
+    result = bind.execute(
+        update(table)
+        .where(and_(*(table.c[name] == value for name, value in key_values.items())))
+        .values({**{name: table.c[name] + value for name, value in deltas.items()}, "updated_at": now})
+    )
+    if result.rowcount == 0:
+        bind.execute(table.insert().values(**key_values, **deltas, updated_at=now))
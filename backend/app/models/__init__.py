@@ -2,11 +2,13 @@ from app.db.base import Base  # noqa: F401
 
 from .account import Account  # noqa: F401
 from .broker import Broker, BrokerStatus  # noqa: F401
+from .daily_user_aggregate import DailyUserAggregate  # noqa: F401
 from .log import LogEntry, LogType  # noqa: F401
 from .order import Order, OrderSide, OrderStatus, OrderType  # noqa: F401
 from .position import Position  # noqa: F401
 from .rms import RmsRule  # noqa: F401
 from .strategy import Strategy, StrategyStatus, StrategyType  # noqa: F401
+from .strategy_performance_summary import StrategyPerformanceSummary  # noqa: F401
 from .strategy_log import StrategyLog, StrategyLogLevel  # noqa: F401
 from .strategy_run import StrategyMode, StrategyRun, StrategyRunStatus  # noqa: F401
 from .execution_group import ExecutionGroup, ExecutionMode  # noqa: F401
@@ -23,6 +25,7 @@ __all__ = [
     "Account",
     "Broker",
     "BrokerStatus",
+    "DailyUserAggregate",
     "LogEntry",
     "LogType",
     "Order",
@@ -34,6 +37,7 @@ __all__ = [
     "Strategy",
     "StrategyStatus",
     "StrategyType",
+    "StrategyPerformanceSummary",
     "StrategyLog",
     "StrategyLogLevel",
     "StrategyMode",
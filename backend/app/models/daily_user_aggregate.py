@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import Date, DateTime, ForeignKey, Integer, Numeric, event, select
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Mapped, Mapper, mapped_column
+
+from app.db.base import Base
+from app.db.upsert import increment_or_insert
+from app.models.account import Account
+from app.models.broker import Broker
+from app.models.order import Order
+from app.models.trade import Trade
+from app.utils.dt import utc_date
+
+
+class DailyUserAggregate(Base):
+    """Running per-user, per-day order lots and realised PnL used by pre-trade RMS checks."""
+
+    __tablename__ = "daily_user_aggregates"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    lots: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    realised_pnl: Mapped[Decimal] = mapped_column(Numeric(18, 2), default=0, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+
+def _bump_aggregate(
+    connection: Connection,
+    user_id: uuid.UUID | None,
+    day: date,
+    *,
+    lots: int = 0,
+    realised_pnl: Decimal | float = 0,
+) -> None:
+    if user_id is None:
+        return
+    increment_or_insert(
+        connection,
+        DailyUserAggregate.__table__,
+        {"user_id": user_id, "day": day},
+        {"lots": lots, "realised_pnl": realised_pnl},
+    )
+
+
+@event.listens_for(Order, "after_insert")
+def _record_order_lots(mapper: Mapper, connection: Connection, target: Order) -> None:
+    user_id = connection.execute(
+        select(Broker.user_id).join(Account, Account.broker_id == Broker.id).where(Account.id == target.account_id)
+    ).scalar()
+    _bump_aggregate(connection, user_id, utc_date(target.created_at), lots=target.qty)
+
+
+@event.listens_for(Trade, "after_insert")
+def _record_trade_pnl(mapper: Mapper, connection: Connection, target: Trade) -> None:
+    if not target.pnl:
+        return
+    user_id = connection.execute(
+        select(Broker.user_id)
+        .join(Account, Account.broker_id == Broker.id)
+        .join(Order, Order.account_id == Account.id)
+        .where(Order.id == target.order_id)
+    ).scalar()
+    _bump_aggregate(connection, user_id, utc_date(target.timestamp), realised_pnl=target.pnl)
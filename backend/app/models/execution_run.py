@@ -4,11 +4,13 @@ from typing import TYPE_CHECKING
 import uuid
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, JSON, String
+from sqlalchemy import DateTime, ForeignKey, Index, String
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from app.core.ids import uuid7
 from app.db.base import Base
+from app.db.types import JSONDocument
 
 if TYPE_CHECKING:
     from app.models.execution_run_event import ExecutionRunEvent
@@ -18,14 +20,18 @@ if TYPE_CHECKING:
 class ExecutionRun(Base):
     __tablename__ = "execution_runs"
 
-    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     group_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("execution_groups.id", ondelete="CASCADE"))
     strategy_run_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), ForeignKey("strategy_runs.id", ondelete="SET NULL"))
     requested_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
     completed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
     status: Mapped[str] = mapped_column(String(32), default="pending")
-    payload: Mapped[dict | None] = mapped_column(JSON)
+    payload: Mapped[dict | None] = mapped_column(JSONDocument)
 
     group: Mapped["ExecutionGroup"] = relationship(back_populates="runs")
     strategy_run: Mapped["StrategyRun | None"] = relationship(back_populates="execution_runs")
     events: Mapped[list["ExecutionRunEvent"]] = relationship(back_populates="run", cascade="all, delete-orphan")
+
+
+Index("ix_execution_runs_group_requested", ExecutionRun.group_id, ExecutionRun.requested_at.desc())
+Index("ix_execution_runs_strategy_run_id", ExecutionRun.strategy_run_id)
@@ -13,7 +13,9 @@ class RmsRule(Base):
     __tablename__ = "rms_rules"
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"))
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), unique=True, index=True
+    )
     max_loss: Mapped[float | None] = mapped_column(Numeric(18, 2))
     max_lots: Mapped[int | None] = mapped_column(Integer)
     profit_lock: Mapped[float | None] = mapped_column(Numeric(18, 2))
@@ -6,11 +6,13 @@ from datetime import datetime
 
 from typing import TYPE_CHECKING
 
-from sqlalchemy import DateTime, Enum, ForeignKey, JSON, Text
+from sqlalchemy import DateTime, Enum, ForeignKey, Index, Text, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from app.core.ids import uuid7
 from app.db.base import Base
+from app.db.types import JSONDocument
 
 if TYPE_CHECKING:
     from app.models.strategy import Strategy
@@ -26,13 +28,17 @@ class StrategyLogLevel(str, enum.Enum):
 class StrategyLog(Base):
     __tablename__ = "strategy_logs"
 
-    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     strategy_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("strategies.id", ondelete="CASCADE"))
     run_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), ForeignKey("strategy_runs.id", ondelete="SET NULL"))
     level: Mapped[StrategyLogLevel] = mapped_column(Enum(StrategyLogLevel, name="strategy_log_level"), default=StrategyLogLevel.info)
     message: Mapped[str] = mapped_column(Text, nullable=False)
-    context: Mapped[dict | None] = mapped_column(JSON)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    context: Mapped[dict | None] = mapped_column(JSONDocument)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     strategy: Mapped["Strategy"] = relationship(back_populates="logs")
     run: Mapped["StrategyRun | None"] = relationship(back_populates="logs")
+
+
+# Serves the "newest rows for a strategy" reads (ORDER BY created_at DESC LIMIT n).
+Index("ix_strategy_logs_strategy_created", StrategyLog.strategy_id, StrategyLog.created_at.desc())
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, Float, ForeignKey, Integer
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, Session, mapped_column
+
+from app.db.base import Base
+from app.db.upsert import increment_or_insert
+
+
+class StrategyPerformanceSummary(Base):
+    """Lifetime PnL and trade totals per strategy, kept current as run metrics are recorded."""
+
+    __tablename__ = "strategy_performance_summaries"
+
+    strategy_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("strategies.id", ondelete="CASCADE"), primary_key=True
+    )
+    lifetime_pnl: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
+    total_trades: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+
+def bump_strategy_performance(
+    session: Session, strategy_id: uuid.UUID, *, pnl: float = 0.0, trades: int = 0
+) -> None:
+    """Add run metric deltas to the strategy's summary row, creating it on first use."""
+    if not pnl and not trades:
+        return
+    increment_or_insert(
+        session,
+        StrategyPerformanceSummary.__table__,
+        {"strategy_id": strategy_id},
+        {"lifetime_pnl": pnl, "total_trades": trades},
+    )
@@ -4,11 +4,13 @@ import enum
 import uuid
 from datetime import datetime
 
-from sqlalchemy import DateTime, Enum, ForeignKey, JSON
+from sqlalchemy import DateTime, Enum, ForeignKey, Index, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from app.core.ids import uuid7
 from app.db.base import Base
+from app.db.types import JSONDocument
 
 
 class StrategyMode(str, enum.Enum):
@@ -28,17 +30,21 @@ class StrategyRunStatus(str, enum.Enum):
 class StrategyRun(Base):
     __tablename__ = "strategy_runs"
 
-    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     strategy_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("strategies.id", ondelete="CASCADE"))
     mode: Mapped[StrategyMode] = mapped_column(Enum(StrategyMode, name="strategy_mode"), nullable=False)
     status: Mapped[StrategyRunStatus] = mapped_column(
         Enum(StrategyRunStatus, name="strategy_run_status"), default=StrategyRunStatus.running
     )
-    parameters: Mapped[dict | None] = mapped_column(JSON)
-    result_metrics: Mapped[dict | None] = mapped_column(JSON)
-    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    parameters: Mapped[dict | None] = mapped_column(JSONDocument)
+    result_metrics: Mapped[dict | None] = mapped_column(JSONDocument)
+    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
 
     strategy: Mapped["Strategy"] = relationship(back_populates="runs")
     logs: Mapped[list["StrategyLog"]] = relationship(back_populates="run", cascade="all, delete-orphan")
     execution_runs: Mapped[list["ExecutionRun"]] = relationship(back_populates="strategy_run")
+
+
+# Serves the "newest rows for a strategy" reads (ORDER BY started_at DESC LIMIT n).
+Index("ix_strategy_runs_strategy_started", StrategyRun.strategy_id, StrategyRun.started_at.desc())
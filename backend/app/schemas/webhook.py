@@ -37,7 +37,10 @@ class WebhookConnectorRead(WebhookConnectorBase):
 class WebhookEventIn(BaseModel):
     connector_id: UUID
     payload: dict[str, Any]
-    signature: str | None = None
+    signature: str | None = Field(
+        default=None,
+        description="Hex HMAC-SHA256 of the payload as compact JSON with sorted keys, keyed by the connector secret",
+    )
     headers: dict[str, str] | None = None
     received_at: datetime | None = None
 
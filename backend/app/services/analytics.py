@@ -13,6 +13,7 @@ from app.models.broker import Broker
 from app.models.order import Order
 from app.models.position import Position
 from app.models.strategy import Strategy
+from app.models.strategy_run import StrategyRun
 from app.models.trade import Trade
 from app.models.execution_group import ExecutionGroup
 from app.models.execution_run import ExecutionRun
@@ -186,36 +187,52 @@ class AnalyticsService:
         return points
 
     def _strategy_rows(self, user_id: uuid.UUID) -> list[StrategyPerformanceRow]:
-        stmt: Select[Strategy] = (
-            select(Strategy)
+        # Totals and the newest run come from window functions over the indexed
+        # (strategy_id, started_at) ordering instead of loading every run.
+        partition = {"partition_by": StrategyRun.strategy_id}
+        ranked = (
+            select(
+                StrategyRun.strategy_id,
+                StrategyRun.status,
+                StrategyRun.started_at,
+                StrategyRun.finished_at,
+                func.row_number()
+                .over(order_by=(StrategyRun.started_at.desc(), StrategyRun.id.desc()), **partition)
+                .label("rank"),
+                func.count().over(**partition).label("total_runs"),
+                func.sum(StrategyRun.result_metrics["pnl"].as_float()).over(**partition).label("pnl"),
+                func.sum(StrategyRun.result_metrics["trades"].as_float()).over(**partition).label("trades"),
+            )
+            .join(Strategy, Strategy.id == StrategyRun.strategy_id)
+            .where(Strategy.user_id == user_id)
+            .subquery()
+        )
+        stmt = (
+            select(
+                Strategy.id,
+                Strategy.name,
+                ranked.c.status,
+                ranked.c.started_at,
+                ranked.c.finished_at,
+                ranked.c.total_runs,
+                ranked.c.pnl,
+                ranked.c.trades,
+            )
+            .outerjoin(ranked, (ranked.c.strategy_id == Strategy.id) & (ranked.c.rank == 1))
             .where(Strategy.user_id == user_id)
-            .options(joinedload(Strategy.runs))
         )
-        strategies = self.session.execute(stmt).unique().scalars().all()
         rows: list[StrategyPerformanceRow] = []
-        for strategy in strategies:
-            runs = list(strategy.runs)
-            cumulative_pnl = 0.0
-            total_trades = 0
-            last_run = None
-            for run in runs:
-                metrics = run.result_metrics or {}
-                cumulative_pnl += float(metrics.get("pnl", 0.0))
-                total_trades += int(metrics.get("trades", 0))
-                if last_run is None or run.started_at > last_run.started_at:
-                    last_run = run
+        for strategy_id, name, status, started_at, finished_at, total_runs, pnl, trades in self.session.execute(stmt):
             rows.append(
                 StrategyPerformanceRow(
-                    strategy_id=strategy.id,
-                    strategy_name=strategy.name,
-                    total_runs=len(runs),
-                    cumulative_pnl=cumulative_pnl,
-                    total_trades=total_trades,
-                    last_run_status=StrategyRunStatusEnum(last_run.status.value)
-                    if last_run is not None
-                    else None,
-                    last_run_started_at=last_run.started_at if last_run is not None else None,
-                    last_run_finished_at=last_run.finished_at if last_run is not None else None,
+                    strategy_id=strategy_id,
+                    strategy_name=name,
+                    total_runs=int(total_runs or 0),
+                    cumulative_pnl=float(pnl or 0.0),
+                    total_trades=int(trades or 0),
+                    last_run_status=StrategyRunStatusEnum(status.value) if status is not None else None,
+                    last_run_started_at=started_at,
+                    last_run_finished_at=finished_at,
                 )
             )
         return rows
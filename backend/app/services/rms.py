@@ -1,20 +1,27 @@
 from __future__ import annotations
 
 import uuid
+from collections import OrderedDict
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from decimal import Decimal
+from functools import cached_property
+from typing import Iterable
 
 from sqlalchemy import Select, func, select
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, raiseload
+
+try:
+    import numpy as np
+except ModuleNotFoundError:  # pragma: no cover - optional dependency fallback
+    np = None  # type: ignore[assignment]
 
 from app.models.account import Account
 from app.models.broker import Broker
+from app.models.daily_user_aggregate import DailyUserAggregate
 from app.models.log import LogEntry, LogType
-from app.models.order import Order
 from app.models.position import Position
 from app.models.rms import RmsRule
-from app.models.trade import Trade
 from app.utils.dt import utcnow
 from app.schemas.order import OrderCreate
 from app.schemas.rms import (
@@ -34,10 +41,59 @@ class _DailySnapshot:
     available_margin: float
 
 
-@dataclass(slots=True)
+_POSITION_BATCH_SIZE = 500
+_CUE_CACHE_SIZE = 64
+# Services can outlive a request (Celery workers cache theirs), so loaded rules are kept LRU-bounded.
+_RULE_CACHE_SIZE = 256
+# Below this many positions the per-row Python loop is cheaper than building an array.
+_VECTORIZE_MIN_POSITIONS = 200
+
+_RULE_DECIMAL_FIELDS = (
+    "max_loss",
+    "profit_lock",
+    "trailing_sl",
+    "max_daily_loss",
+    "exposure_limit",
+    "margin_buffer_pct",
+    "drawdown_limit",
+    "auto_square_off_buffer_pct",
+    "auto_hedge_ratio",
+)
+_RULE_PLAIN_FIELDS = (
+    "max_lots",
+    "max_daily_lots",
+    "auto_square_off_enabled",
+    "auto_hedge_enabled",
+    "notify_email",
+    "notify_telegram",
+    "updated_at",
+)
+
+_AUTOMATED_SQUARE_OFF_PREFIX = "Automated RMS square-off"
+# Automated square-offs recorded within this window are treated as the same trip.
+_SQUARE_OFF_DEDUP_WINDOW = timedelta(seconds=60)
+_SQUARE_OFF_ALREADY_QUEUED_MESSAGE = "Automated RMS square-off already queued"
+
+_SQUARE_OFF_LOSS_MESSAGE = "Auto square-off triggered: day PnL {:.2f} breached loss limit {:.2f}"
+_SQUARE_OFF_PROFIT_MESSAGE = "Auto square-off triggered: profit lock target {:.2f} reached (PnL {:.2f})"
+_HEDGE_LIMIT_MESSAGE = "Auto hedge triggered: exposure {:.2f} within 10% of limit {:.2f} (ratio {:.2f})"
+_HEDGE_COVERAGE_MESSAGE = "Auto hedge triggered: exposure {:.2f} requires coverage (ratio {:.2f})"
+
+
 class _AutomationCue:
-    code: str
-    message: str
+    """Automation recommendation whose message is only formatted when read."""
+
+    def __init__(self, code: str, template: str, *values: float) -> None:
+        self.code = code
+        self._template = template
+        self._values = values
+
+    @cached_property
+    def message(self) -> str:
+        return self._template.format(*self._values)
+
+    def __str__(self) -> str:
+        return self.message
 
 
 class RmsViolationError(ValueError):
@@ -51,6 +107,9 @@ class RmsService:
 
     def __init__(self, session: Session) -> None:
         self.session = session
+        # Rules are unique per user, so repeat checks within one service reuse the loaded row.
+        self._rules: OrderedDict[uuid.UUID, RmsRule] = OrderedDict()
+        self._cue_cache: OrderedDict[tuple, list[_AutomationCue]] = OrderedDict()
 
     # ------------------------------------------------------------------
     # Public API
@@ -69,11 +128,14 @@ class RmsService:
         self.session.refresh(rule)
         return self._to_config(rule)
 
-    def get_status(self, user_id: uuid.UUID) -> RmsStatusRead:
+    def get_status(self, user_id: uuid.UUID, *, detailed: bool = False) -> RmsStatusRead:
+        """Summarise today's risk usage; automation messages are only built when ``detailed``."""
+
         rule = self._get_or_create_rule(user_id)
         snapshot = self._daily_snapshot(user_id)
-        automation_cues = self._automation_recommendations(rule, snapshot)
-        automations = [cue.message for cue in automation_cues]
+        automations: list[str] = []
+        if detailed:
+            automations = [cue.message for cue in self._automation_recommendations(rule, snapshot)]
         alerts: list[str] = []
         lots_remaining = None
         if rule.max_daily_lots:
@@ -105,7 +167,6 @@ class RmsService:
 
     def evaluate_pre_trade(self, user_id: uuid.UUID, payload: OrderCreate) -> None:
         rule = self._get_or_create_rule(user_id)
-        status = self.get_status(user_id)
 
         if rule.max_lots is not None and payload.qty > rule.max_lots:
             raise RmsViolationError(
@@ -113,21 +174,31 @@ class RmsService:
                 f"Order quantity {payload.qty} exceeds max lots per order {rule.max_lots}",
             )
 
+        # The daily snapshot costs several aggregate queries; only pay for it
+        # when at least one limit actually depends on it.
+        needs_snapshot = any(
+            limit is not None
+            for limit in (rule.max_daily_lots, rule.max_daily_loss, rule.exposure_limit, rule.margin_buffer_pct)
+        )
+        if not needs_snapshot:
+            return
+        snapshot = self._daily_snapshot(user_id)
+
         if rule.max_daily_lots is not None:
-            if status.total_lots_today + payload.qty > rule.max_daily_lots:
+            if snapshot.total_lots + payload.qty > rule.max_daily_lots:
                 raise RmsViolationError(
                     "RMS_MAX_DAILY_LOTS",
                     "Daily lot limit would be exceeded by this order",
                 )
 
-        if rule.max_daily_loss is not None and status.day_pnl <= -float(rule.max_daily_loss):
+        if rule.max_daily_loss is not None and snapshot.day_pnl <= -float(rule.max_daily_loss):
             raise RmsViolationError(
                 "RMS_MAX_DAILY_LOSS",
                 "Daily loss threshold breached; new orders are blocked",
             )
 
         if rule.exposure_limit is not None:
-            projected_exposure = status.notional_exposure + self._estimate_notional(payload)
+            projected_exposure = snapshot.notional_exposure + self._estimate_notional(payload)
             if projected_exposure > float(rule.exposure_limit):
                 raise RmsViolationError(
                     "RMS_EXPOSURE_LIMIT",
@@ -136,7 +207,7 @@ class RmsService:
 
         if rule.margin_buffer_pct is not None:
             required_margin = self._estimate_notional(payload)
-            allowed_utilisation = status.available_margin * (float(rule.margin_buffer_pct) / 100)
+            allowed_utilisation = snapshot.available_margin * (float(rule.margin_buffer_pct) / 100)
             if allowed_utilisation and required_margin > allowed_utilisation:
                 raise RmsViolationError(
                     "RMS_MARGIN_BUFFER",
@@ -145,7 +216,9 @@ class RmsService:
 
     def auto_enforce(self, user_id: uuid.UUID) -> list[str]:
         rule = self._get_or_create_rule(user_id)
-        snapshot = self._daily_snapshot(user_id)
+        # One timestamp for the whole enforcement pass keeps its log lines coherent.
+        now = utcnow()
+        snapshot = self._daily_snapshot(user_id, now=now)
         cues = self._automation_recommendations(rule, snapshot)
         executed: list[str] = []
         square_off_executed = False
@@ -154,9 +227,13 @@ class RmsService:
             if cue.code == "auto_square_off":
                 if square_off_executed:
                     continue
-                response = self.trigger_square_off(user_id, reason=cue.message, automated=True)
-                executed.append(f"{cue.message} ({len(response.positions)} positions queued)")
-                self._record_notifications(rule, user_id, cue.message)
+                response, deduplicated = self._queue_square_off(user_id, reason=cue.message, automated=True, now=now)
+                if deduplicated:
+                    # The earlier pass already notified for this trip.
+                    executed.append(f"{cue.message} (skipped: already queued)")
+                else:
+                    executed.append(f"{cue.message} ({len(response.positions)} positions queued)")
+                    self._record_notifications(rule, user_id, cue.message, now=now)
                 square_off_executed = True
             elif cue.code == "auto_hedge":
                 if hedge_executed:
@@ -165,14 +242,41 @@ class RmsService:
                 self._log_rms_event(
                     user_id,
                     f"Auto hedge queued (ratio {ratio:.2f}): {cue.message}",
+                    now=now,
                 )
                 executed.append(cue.message)
-                self._record_notifications(rule, user_id, cue.message)
+                self._record_notifications(rule, user_id, cue.message, now=now)
                 hedge_executed = True
         return executed
 
-    def trigger_square_off(self, user_id: uuid.UUID, *, reason: str | None = None, automated: bool = False) -> RmsSquareOffResponse:
-        positions = self._user_positions(user_id)
+    def trigger_square_off(
+        self,
+        user_id: uuid.UUID,
+        *,
+        reason: str | None = None,
+        automated: bool = False,
+        now: datetime | None = None,
+    ) -> RmsSquareOffResponse:
+        response, _ = self._queue_square_off(user_id, reason=reason, automated=automated, now=now)
+        return response
+
+    def _queue_square_off(
+        self,
+        user_id: uuid.UUID,
+        *,
+        reason: str | None,
+        automated: bool,
+        now: datetime | None,
+    ) -> tuple[RmsSquareOffResponse, bool]:
+        # The flag reports an automated request dropped as a duplicate of one already queued.
+        now = now or utcnow()
+        if automated:
+            # Concurrent automation runs for the user queue on the rule row lock (held until the
+            # commit below), so each duplicate check sees the previous run's committed log entry.
+            self._lock_rule_row(user_id)
+            if self._recent_automated_square_off(user_id, now):
+                self.session.commit()
+                return RmsSquareOffResponse(triggered=False, message=_SQUARE_OFF_ALREADY_QUEUED_MESSAGE), True
         position_snapshots = [
             PositionSnapshot(
                 account_id=pos.account_id,
@@ -180,7 +284,7 @@ class RmsService:
                 qty=pos.qty,
                 updated_at=pos.updated_at,
             )
-            for pos in positions
+            for pos in self._user_positions(user_id)
             if pos.qty != 0
         ]
         default_message = "Square-off request recorded; execution to be handled by downstream worker"
@@ -192,7 +296,7 @@ class RmsService:
             )
         elif automated:
             response_message = "Automated RMS square-off triggered"
-            log_message = "Automated RMS square-off triggered"
+            log_message = _AUTOMATED_SQUARE_OFF_PREFIX + " triggered"
         else:
             response_message = default_message
             log_message = "Manual RMS square-off requested"
@@ -200,16 +304,40 @@ class RmsService:
             user_id=user_id,
             type=LogType.rms,
             message=log_message,
-            created_at=utcnow(),
+            created_at=now,
         )
         self.session.add(log_entry)
         self.session.commit()
-        return RmsSquareOffResponse(triggered=bool(position_snapshots), message=response_message, positions=position_snapshots)
+        response = RmsSquareOffResponse(
+            triggered=bool(position_snapshots), message=response_message, positions=position_snapshots
+        )
+        return response, False
 
     # ------------------------------------------------------------------
     # Internal helpers
     # ------------------------------------------------------------------
     def _automation_recommendations(self, rule: RmsRule, snapshot: _DailySnapshot) -> list[_AutomationCue]:
+        # Recommendations are a pure function of the rule revision and the snapshot,
+        # so status reads and enforcement in quick succession share one evaluation.
+        key = (
+            rule.id,
+            rule.updated_at,
+            snapshot.total_lots,
+            snapshot.day_pnl,
+            snapshot.notional_exposure,
+            snapshot.available_margin,
+        )
+        cached = self._cue_cache.get(key)
+        if cached is not None:
+            self._cue_cache.move_to_end(key)
+            return list(cached)
+        cues = self._evaluate_automation_cues(rule, snapshot)
+        self._cue_cache[key] = cues
+        if len(self._cue_cache) > _CUE_CACHE_SIZE:
+            self._cue_cache.popitem(last=False)
+        return list(cues)
+
+    def _evaluate_automation_cues(self, rule: RmsRule, snapshot: _DailySnapshot) -> list[_AutomationCue]:
         cues: list[_AutomationCue] = []
         if rule.auto_square_off_enabled:
             trigger_loss: float | None = None
@@ -224,26 +352,13 @@ class RmsService:
                 if drawdown_limit is not None:
                     trigger_loss = -drawdown_limit
             if trigger_loss is not None and snapshot.day_pnl <= trigger_loss:
-                limit_value = abs(trigger_loss)
                 cues.append(
-                    _AutomationCue(
-                        code="auto_square_off",
-                        message=(
-                            f"Auto square-off triggered: day PnL {snapshot.day_pnl:.2f} "
-                            f"breached loss limit {limit_value:.2f}"
-                        ),
-                    )
+                    _AutomationCue("auto_square_off", _SQUARE_OFF_LOSS_MESSAGE, snapshot.day_pnl, abs(trigger_loss))
                 )
             profit_lock = self._decimal_to_float(rule.profit_lock)
             if profit_lock is not None and snapshot.day_pnl >= profit_lock:
                 cues.append(
-                    _AutomationCue(
-                        code="auto_square_off",
-                        message=(
-                            f"Auto square-off triggered: profit lock target {profit_lock:.2f} reached "
-                            f"(PnL {snapshot.day_pnl:.2f})"
-                        ),
-                    )
+                    _AutomationCue("auto_square_off", _SQUARE_OFF_PROFIT_MESSAGE, profit_lock, snapshot.day_pnl)
                 )
         if rule.auto_hedge_enabled:
             ratio = self._decimal_to_float(rule.auto_hedge_ratio) or 1.0
@@ -253,86 +368,82 @@ class RmsService:
                 if snapshot.notional_exposure >= hedge_trigger:
                     cues.append(
                         _AutomationCue(
-                            code="auto_hedge",
-                            message=(
-                                f"Auto hedge triggered: exposure {snapshot.notional_exposure:.2f} "
-                                f"within 10% of limit {exposure_limit:.2f} (ratio {ratio:.2f})"
-                            ),
+                            "auto_hedge",
+                            _HEDGE_LIMIT_MESSAGE,
+                            snapshot.notional_exposure,
+                            exposure_limit,
+                            ratio,
                         )
                     )
             elif snapshot.notional_exposure > 0:
                 cues.append(
-                    _AutomationCue(
-                        code="auto_hedge",
-                        message=(
-                            f"Auto hedge triggered: exposure {snapshot.notional_exposure:.2f} "
-                            f"requires coverage (ratio {ratio:.2f})"
-                        ),
-                    )
+                    _AutomationCue("auto_hedge", _HEDGE_COVERAGE_MESSAGE, snapshot.notional_exposure, ratio)
                 )
         return cues
 
-    def _record_notifications(self, rule: RmsRule, user_id: uuid.UUID, detail: str) -> None:
+    def _record_notifications(
+        self, rule: RmsRule, user_id: uuid.UUID, detail: str, *, now: datetime | None = None
+    ) -> None:
         channels: list[str] = []
         if rule.notify_email:
             channels.append("email")
         if rule.notify_telegram:
             channels.append("telegram")
         for channel in channels:
-            self._log_rms_event(user_id, f"Notification queued via {channel}: {detail}")
+            self._log_rms_event(user_id, f"Notification queued via {channel}: {detail}", now=now)
 
-    def _log_rms_event(self, user_id: uuid.UUID, message: str) -> None:
+    def _log_rms_event(self, user_id: uuid.UUID, message: str, *, now: datetime | None = None) -> None:
         entry = LogEntry(
             user_id=user_id,
             type=LogType.rms,
             message=message,
-            created_at=utcnow(),
+            created_at=now or utcnow(),
         )
         self.session.add(entry)
         self.session.commit()
 
     def _get_or_create_rule(self, user_id: uuid.UUID) -> RmsRule:
-        stmt: Select[RmsRule] = select(RmsRule).where(RmsRule.user_id == user_id).limit(1)
-        rule = self.session.execute(stmt).scalar_one_or_none()
+        rule = self._rules.get(user_id)
+        # A closed or reset session drops the cached rule; reload it rather than use a detached copy.
+        if rule is not None and rule in self.session:
+            self._rules.move_to_end(user_id)
+            return rule
+        stmt: Select[RmsRule] = select(RmsRule).where(RmsRule.user_id == user_id)
+        rule = self.session.scalars(stmt).first()
         if rule is None:
             rule = RmsRule(user_id=user_id)
             self.session.add(rule)
             self.session.commit()
             self.session.refresh(rule)
+        self._rules[user_id] = rule
+        self._rules.move_to_end(user_id)
+        if len(self._rules) > _RULE_CACHE_SIZE:
+            self._rules.popitem(last=False)
         return rule
 
-    def _daily_snapshot(self, user_id: uuid.UUID) -> _DailySnapshot:
-        start = self._day_start()
-        lots_stmt = (
-            select(func.coalesce(func.sum(Order.qty), 0))
-            .select_from(Order)
-            .join(Order.account)
-            .join(Account.broker)
-            .where(Broker.user_id == user_id, Order.created_at >= start)
-        )
-        total_lots = int(self.session.execute(lots_stmt).scalar_one() or 0)
-
-        trades_stmt = (
-            select(func.coalesce(func.sum(Trade.pnl), 0))
-            .select_from(Trade)
-            .join(Trade.order)
-            .join(Order.account)
-            .join(Account.broker)
-            .where(Broker.user_id == user_id, Trade.timestamp >= start)
-        )
-        trade_pnl = self._decimal_to_float(self.session.execute(trades_stmt).scalar_one() or 0)
+    def _daily_snapshot(self, user_id: uuid.UUID, *, now: datetime | None = None) -> _DailySnapshot:
+        start = self._day_start(now)
+        # Order lots and realised PnL are maintained incrementally on insert, so
+        # the day's totals are a single primary-key lookup.
+        aggregate = self.session.get(DailyUserAggregate, (user_id, start.date()), populate_existing=True)
+        total_lots = aggregate.lots if aggregate is not None else 0
+        trade_pnl = self._decimal_to_float(aggregate.realised_pnl) if aggregate is not None else 0.0
 
         positions_stmt = (
-            select(Position)
+            select(Position.qty, Position.avg_price, func.coalesce(Position.pnl, 0))
+            .select_from(Position)
             .join(Position.account)
             .join(Account.broker)
-            .options(joinedload(Position.account))
             .where(Broker.user_id == user_id)
         )
-        positions: list[Position] = list(self.session.execute(positions_stmt).scalars())
-
-        unrealised_pnl = sum(self._decimal_to_float(pos.pnl or 0) for pos in positions)
-        notional_exposure = sum(abs(pos.qty) * self._decimal_to_float(pos.avg_price) for pos in positions)
+        rows = self.session.execute(positions_stmt).all()
+        if np is not None and len(rows) >= _VECTORIZE_MIN_POSITIONS:
+            values = np.array(rows, dtype=np.float64)
+            notional_exposure = float(np.abs(values[:, 0]).dot(values[:, 1]))
+            unrealised_pnl = float(values[:, 2].sum())
+        else:
+            notional_exposure = sum(abs(qty) * float(avg_price) for qty, avg_price, _ in rows)
+            unrealised_pnl = sum(float(pnl) for _, _, pnl in rows)
 
         margin_stmt = (
             select(func.coalesce(func.sum(Account.margin), 0))
@@ -349,14 +460,32 @@ class RmsService:
             available_margin=available_margin,
         )
 
-    def _user_positions(self, user_id: uuid.UUID) -> list[Position]:
+    def _user_positions(self, user_id: uuid.UUID) -> Iterable[Position]:
         stmt = (
             select(Position)
             .join(Position.account)
             .join(Account.broker)
+            .options(raiseload("*"))
             .where(Broker.user_id == user_id)
         )
-        return list(self.session.execute(stmt).scalars())
+        return self.session.execute(stmt.execution_options(yield_per=_POSITION_BATCH_SIZE)).scalars()
+
+    def _lock_rule_row(self, user_id: uuid.UUID) -> None:
+        rule = self._get_or_create_rule(user_id)
+        self.session.execute(select(RmsRule.id).where(RmsRule.id == rule.id).with_for_update())
+
+    def _recent_automated_square_off(self, user_id: uuid.UUID, now: datetime) -> bool:
+        stmt = (
+            select(LogEntry.id)
+            .where(
+                LogEntry.user_id == user_id,
+                LogEntry.type == LogType.rms,
+                LogEntry.message.startswith(_AUTOMATED_SQUARE_OFF_PREFIX),
+                LogEntry.created_at >= now - _SQUARE_OFF_DEDUP_WINDOW,
+            )
+            .limit(1)
+        )
+        return self.session.execute(stmt).first() is not None
 
     def _estimate_notional(self, payload: OrderCreate) -> float:
         if payload.price is None:
@@ -364,36 +493,19 @@ class RmsService:
         return abs(payload.qty) * float(payload.price)
 
     def _to_config(self, rule: RmsRule) -> RmsConfigRead:
-        return RmsConfigRead(
-            max_loss=self._decimal_to_float(rule.max_loss),
-            max_lots=rule.max_lots,
-            profit_lock=self._decimal_to_float(rule.profit_lock),
-            trailing_sl=self._decimal_to_float(rule.trailing_sl),
-            max_daily_loss=self._decimal_to_float(rule.max_daily_loss),
-            max_daily_lots=rule.max_daily_lots,
-            exposure_limit=self._decimal_to_float(rule.exposure_limit),
-            margin_buffer_pct=self._decimal_to_float(rule.margin_buffer_pct),
-            drawdown_limit=self._decimal_to_float(rule.drawdown_limit),
-            auto_square_off_enabled=rule.auto_square_off_enabled,
-            auto_square_off_buffer_pct=self._decimal_to_float(rule.auto_square_off_buffer_pct),
-            auto_hedge_enabled=rule.auto_hedge_enabled,
-            auto_hedge_ratio=self._decimal_to_float(rule.auto_hedge_ratio),
-            notify_email=rule.notify_email,
-            notify_telegram=rule.notify_telegram,
-            updated_at=rule.updated_at,
-        )
+        # Values come straight from the ORM row, so skip Pydantic validation.
+        fields: dict[str, object] = {name: self._decimal_to_float(getattr(rule, name)) for name in _RULE_DECIMAL_FIELDS}
+        fields.update({name: getattr(rule, name) for name in _RULE_PLAIN_FIELDS})
+        return RmsConfigRead.model_construct(**fields)
 
     @staticmethod
     def _decimal_to_float(value: Decimal | float | None) -> float | None:
-        if value is None:
-            return None
-        if isinstance(value, Decimal):
-            return float(value)
-        return value
+        # float() accepts Decimal, int and float alike, so no type dispatch is needed.
+        return None if value is None else float(value)
 
     @staticmethod
-    def _day_start() -> datetime:
-        now = utcnow()
+    def _day_start(now: datetime | None = None) -> datetime:
+        now = now or utcnow()
         return now.replace(hour=0, minute=0, second=0, microsecond=0)
 
 
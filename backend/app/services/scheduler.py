@@ -1,34 +1,88 @@
 from __future__ import annotations
 
+import re
 import uuid
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Any
+from typing import Any, Iterable
 
-from sqlalchemy import select
+from loguru import logger
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 
+from app.db.session import SessionLocal
 from app.models.scheduler_job import SchedulerJob
 from app.schemas.scheduler import ScheduledJobCreate
 from app.tasks.strategy import trigger_strategy_run
 
-ALLOWED_SPECIAL_CRON = {"@once", "@hourly", "@daily", "@weekly", "@monthly"}
+_JOB_BATCH_SIZE = 500
+
+ALLOWED_SPECIAL_CRON = frozenset({"@once", "@hourly", "@daily", "@weekly", "@monthly"})
+# One cron field is a comma-separated list of items. An item is "*", a value or a "value-value"
+# range, optionally followed by a numeric "/step"; values are numbers or three-letter month/day
+# names such as JAN or MON. Vendor extensions ("L", "W", "#", "?") are not supported.
+_CRON_NAMES = "JAN|FEB|MAR|APR|MAY|JUN|JUL|AUG|SEP|OCT|NOV|DEC|SUN|MON|TUE|WED|THU|FRI|SAT"
+_CRON_VALUE = rf"(?:\d+|{_CRON_NAMES})"
+_CRON_ITEM = rf"(?:\*|{_CRON_VALUE}(?:-{_CRON_VALUE})?)(?:/\d+)?"
+_CRON_FIELD_RE = re.compile(rf"{_CRON_ITEM}(?:,{_CRON_ITEM})*", re.IGNORECASE | re.ASCII)
 
 
 def _now() -> datetime:
     return datetime.utcnow()
 
 
+@dataclass(frozen=True, slots=True)
+class PendingStrategyRun:
+    """A job already stamped as triggered whose strategy run still has to reach the broker."""
+
+    job_id: uuid.UUID
+    run_kwargs: dict[str, Any]
+    triggered_at: datetime | None
+    previous_triggered_at: datetime | None
+
+    def publish(self, session: Session | None = None, *, reraise: bool = True) -> None:
+        """Enqueue the run; if the broker publish fails, restore the previous trigger stamp.
+
+        Without ``session`` (e.g. from a background task, after the request session closed) the
+        restore runs in a short-lived session of its own. With ``reraise`` the failure propagates
+        to the caller; background tasks pass ``reraise=False`` so it is logged here instead, as
+        nobody is left to handle it once the response has been sent.
+        """
+        try:
+            trigger_strategy_run.delay(**self.run_kwargs)
+        except Exception:
+            if session is not None:
+                self._restore_stamp(session)
+            else:
+                with SessionLocal() as own_session:
+                    self._restore_stamp(own_session)
+            if reraise:
+                raise
+            logger.exception("Publishing the strategy run for scheduler job {} failed", self.job_id)
+
+    def _restore_stamp(self, session: Session) -> None:
+        # Only undo our own stamp; a later trigger of the same job keeps its timestamp.
+        session.execute(
+            update(SchedulerJob)
+            .where(SchedulerJob.id == self.job_id, SchedulerJob.last_triggered_at == self.triggered_at)
+            .values(last_triggered_at=self.previous_triggered_at)
+        )
+        session.commit()
+
+
 class StrategySchedulerService:
     """Database-backed scheduler service for strategy jobs."""
 
     def __init__(self, session: Session) -> None:
         self.session = session
 
-    def list_jobs(self, user_id: uuid.UUID, strategy_id: uuid.UUID | None = None) -> list[SchedulerJob]:
+    def list_jobs(self, user_id: uuid.UUID, strategy_id: uuid.UUID | None = None) -> Iterable[SchedulerJob]:
+        """Stream the user's jobs; callers iterate the result once."""
+
         stmt = select(SchedulerJob).where(SchedulerJob.user_id == user_id)
         if strategy_id is not None:
             stmt = stmt.where(SchedulerJob.strategy_id == strategy_id)
-        return self.session.execute(stmt).scalars().all()
+        return self.session.execute(stmt.execution_options(yield_per=_JOB_BATCH_SIZE)).scalars()
 
     def create_job(self, user_id: uuid.UUID, payload: ScheduledJobCreate) -> SchedulerJob:
         self._validate_cron(payload.cron_expression)
@@ -54,20 +108,32 @@ class StrategySchedulerService:
         return True
 
     def trigger_job(self, user_id: uuid.UUID, job_id: uuid.UUID) -> SchedulerJob:
+        job, pending = self.stage_trigger(user_id, job_id)
+        pending.publish(self.session)
+        return job
+
+    def stage_trigger(self, user_id: uuid.UUID, job_id: uuid.UUID) -> tuple[SchedulerJob, PendingStrategyRun]:
+        """Mark a job as triggered and commit, leaving the broker publish to the caller.
+
+        Routers hand ``pending.publish`` to their background tasks, with ``reraise=False``, so the
+        publish happens after the response has been sent.
+        """
+
         job = self.session.get(SchedulerJob, job_id)
         if job is None or job.user_id != user_id:
             raise KeyError("Job not found")
+        previous_triggered_at = job.last_triggered_at
         job.last_triggered_at = _now()
         self.session.add(job)
         self.session.commit()
         self.session.refresh(job)
-
-        trigger_strategy_run.delay(
-            user_id=str(job.user_id),
-            strategy_id=str(job.strategy_id) if job.strategy_id else None,
-            context=job.context or {},
+        pending = PendingStrategyRun(
+            job_id=job.id,
+            run_kwargs=self._run_kwargs(job),
+            triggered_at=job.last_triggered_at,
+            previous_triggered_at=previous_triggered_at,
         )
-        return job
+        return job, pending
 
     def enqueue_webhook_job(
         self,
@@ -77,6 +143,20 @@ class StrategySchedulerService:
         strategy_id: uuid.UUID | None,
         context: dict[str, Any] | None = None,
     ) -> SchedulerJob:
+        job, pending = self.stage_webhook_job(
+            user_id=user_id, provider=provider, strategy_id=strategy_id, context=context
+        )
+        pending.publish(self.session)
+        return job
+
+    def stage_webhook_job(
+        self,
+        *,
+        user_id: uuid.UUID,
+        provider: str,
+        strategy_id: uuid.UUID | None,
+        context: dict[str, Any] | None = None,
+    ) -> tuple[SchedulerJob, PendingStrategyRun]:
         job_data = ScheduledJobCreate(
             name=f"Webhook dispatch ({provider})",
             cron_expression='@once',
@@ -85,7 +165,15 @@ class StrategySchedulerService:
             context=context,
         )
         job = self.create_job(user_id, job_data)
-        return self.trigger_job(user_id, job.id)
+        return self.stage_trigger(user_id, job.id)
+
+    @staticmethod
+    def _run_kwargs(job: SchedulerJob) -> dict[str, Any]:
+        return {
+            "user_id": str(job.user_id),
+            "strategy_id": str(job.strategy_id) if job.strategy_id else None,
+            "context": job.context or {},
+        }
 
     @staticmethod
     def _validate_cron(cron_expression: str) -> None:
@@ -97,13 +185,8 @@ class StrategySchedulerService:
         if len(parts) != 5:
             raise ValueError("Cron expression must contain 5 fields (minute hour day month weekday)")
         for part in parts:
-            if part == "*":
-                continue
-            if part.isdigit():
-                continue
-            if any(token in part for token in {"/", "-", ","}):
-                continue
-            raise ValueError(f"Unsupported cron token: {part}")
+            if _CRON_FIELD_RE.fullmatch(part) is None:
+                raise ValueError(f"Unsupported cron token: {part}")
 
 
-__all__ = ["StrategySchedulerService"]
+__all__ = ["PendingStrategyRun", "StrategySchedulerService"]
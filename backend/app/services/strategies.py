@@ -1,15 +1,15 @@
 ﻿from __future__ import annotations
 
 import uuid
-from datetime import datetime
-from typing import Iterable
+from typing import Any, Iterable
 
 from loguru import logger
-from sqlalchemy import Select, select
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import Select, func, insert, select
+from sqlalchemy.orm import Session, load_only
 
 from app.models.strategy import Strategy, StrategyStatus, StrategyType
 from app.models.strategy_log import StrategyLog, StrategyLogLevel
+from app.models.strategy_performance_summary import StrategyPerformanceSummary, bump_strategy_performance
 from app.models.strategy_run import StrategyMode, StrategyRun, StrategyRunStatus
 from app.schemas.strategy import (
     StrategyCreate,
@@ -28,6 +28,25 @@ from app.schemas.strategy import (
     StrategyTypeEnum,
     StrategyUpdate,
 )
+from app.utils.dt import utcnow
+
+# ORM and API enums share their values, so conversions are precomputed once.
+_TYPE_MAP = {member: StrategyTypeEnum(member.value) for member in StrategyType}
+_STATUS_MAP = {member: StrategyStatusEnum(member.value) for member in StrategyStatus}
+_MODE_MAP = {member: StrategyModeEnum(member.value) for member in StrategyMode}
+_RUN_STATUS_MAP = {member: StrategyRunStatusEnum(member.value) for member in StrategyRunStatus}
+_LOG_LEVEL_MAP = {member: StrategyLogLevelEnum(member.value) for member in StrategyLogLevel}
+_LOG_LEVEL_BY_VALUE = {member.value: member for member in StrategyLogLevel}
+_FINISHED_RUN_STATUSES = frozenset(
+    {StrategyRunStatus.completed, StrategyRunStatus.failed, StrategyRunStatus.stopped}
+)
+
+
+def _metric(metrics: dict, key: str) -> float:
+    try:
+        return float(metrics.get(key) or 0)
+    except (TypeError, ValueError):
+        return 0.0
 
 
 class StrategyService:
@@ -42,38 +61,66 @@ class StrategyService:
     def _strategy_stmt(self, user_id: uuid.UUID) -> Select[tuple[Strategy]]:
         return (
             select(Strategy)
-            .options(joinedload(Strategy.runs))
             .where(Strategy.user_id == user_id)
             .order_by(Strategy.created_at.asc())
         )
 
     def _get_strategy(self, user_id: uuid.UUID, strategy_id: uuid.UUID | str) -> Strategy | None:
+        # Routers already hand over parsed UUIDs; only string ids need converting.
+        if not isinstance(strategy_id, uuid.UUID):
+            strategy_id = uuid.UUID(str(strategy_id))
         stmt = (
             select(Strategy)
-            .options(joinedload(Strategy.runs))
-            .where(Strategy.user_id == user_id, Strategy.id == uuid.UUID(str(strategy_id)))
+            .where(Strategy.user_id == user_id, Strategy.id == strategy_id)
+            .limit(1)
+        )
+        return self.session.execute(stmt).scalar_one_or_none()
+
+    def _runs_stmt(self, strategy: Strategy) -> Select[tuple[StrategyRun]]:
+        return (
+            select(StrategyRun)
+            .where(StrategyRun.strategy_id == strategy.id)
+            .order_by(StrategyRun.started_at.desc(), StrategyRun.id.desc())
             .limit(1)
         )
-        return self.session.execute(stmt).unique().scalar_one_or_none()
 
     def _active_run(self, strategy: Strategy) -> StrategyRun | None:
-        for run in sorted(strategy.runs, key=lambda r: r.started_at, reverse=True):
-            if run.status in {StrategyRunStatus.running, StrategyRunStatus.queued}:
-                return run
-        return None
+        stmt = self._runs_stmt(strategy).where(
+            StrategyRun.status.in_([StrategyRunStatus.running, StrategyRunStatus.queued])
+        )
+        return self.session.execute(stmt).scalar_one_or_none()
 
     def _latest_run(self, strategy: Strategy) -> StrategyRun | None:
-        if not strategy.runs:
-            return None
-        return max(strategy.runs, key=lambda run: run.started_at)
+        return self.session.execute(self._runs_stmt(strategy)).scalar_one_or_none()
+
+    def _latest_runs(self, strategy_ids: list[uuid.UUID]) -> dict[uuid.UUID, StrategyRun]:
+        """Return the newest run per strategy using a single windowed query."""
+
+        if not strategy_ids:
+            return {}
+        ranked = (
+            select(
+                StrategyRun.id,
+                func.row_number()
+                .over(
+                    partition_by=StrategyRun.strategy_id,
+                    order_by=(StrategyRun.started_at.desc(), StrategyRun.id.desc()),
+                )
+                .label("rank"),
+            )
+            .where(StrategyRun.strategy_id.in_(strategy_ids))
+            .subquery()
+        )
+        stmt = select(StrategyRun).join(ranked, ranked.c.id == StrategyRun.id).where(ranked.c.rank == 1)
+        return {run.strategy_id: run for run in self.session.execute(stmt).scalars()}
 
-    def _to_strategy_read(self, strategy: Strategy) -> StrategyRead:
-        latest_run = self._latest_run(strategy)
-        return StrategyRead(
+    # The _to_*_read builders take trusted ORM values, so the response models skip validation.
+    def _to_strategy_read(self, strategy: Strategy, latest_run: StrategyRun | None) -> StrategyRead:
+        return StrategyRead.model_construct(
             id=strategy.id,
             name=strategy.name,
-            type=StrategyTypeEnum(strategy.type.value),
-            status=StrategyStatusEnum(strategy.status.value),
+            type=_TYPE_MAP[strategy.type],
+            status=_STATUS_MAP[strategy.status],
             params=strategy.params or {},
             created_at=strategy.created_at,
             latest_run=self._to_run_read(latest_run) if latest_run else None,
@@ -82,22 +129,22 @@ class StrategyService:
     def _to_run_read(self, run: StrategyRun | None) -> StrategyRunRead | None:
         if run is None:
             return None
-        return StrategyRunRead(
+        return StrategyRunRead.model_construct(
             id=run.id,
-            mode=StrategyModeEnum(run.mode.value),
-            status=StrategyRunStatusEnum(run.status.value),
+            mode=_MODE_MAP[run.mode],
+            status=_RUN_STATUS_MAP[run.status],
             started_at=run.started_at,
             finished_at=run.finished_at,
             result_metrics=run.result_metrics or {},
         )
 
-    def _to_log_read(self, log: StrategyLog) -> StrategyLogRead:
-        return StrategyLogRead(
+    def _to_log_read(self, log: StrategyLog, *, include_context: bool = True) -> StrategyLogRead:
+        return StrategyLogRead.model_construct(
             id=log.id,
             run_id=log.run_id,
-            level=StrategyLogLevelEnum(log.level.value),
+            level=_LOG_LEVEL_MAP[log.level],
             message=log.message,
-            context=log.context or {},
+            context=(log.context or {}) if include_context else {},
             created_at=log.created_at,
         )
 
@@ -120,16 +167,19 @@ class StrategyService:
         self.session.add(strategy)
         self.session.commit()
         self.session.refresh(strategy)
-        return self._to_strategy_read(strategy)
+        return self._to_strategy_read(strategy, None)
 
     def list_strategies(self, user_id: uuid.UUID) -> StrategyListResponse:
         stmt = self._strategy_stmt(user_id)
-        strategies: Iterable[Strategy] = self.session.execute(stmt).unique().scalars()
-        return StrategyListResponse(strategies=[self._to_strategy_read(s) for s in strategies])
+        strategies: list[Strategy] = list(self.session.execute(stmt).scalars())
+        latest_runs = self._latest_runs([strategy.id for strategy in strategies])
+        return StrategyListResponse(
+            strategies=[self._to_strategy_read(s, latest_runs.get(s.id)) for s in strategies]
+        )
 
     def get_strategy(self, user_id: uuid.UUID, strategy_id: uuid.UUID | str) -> StrategyRead:
         strategy = self._ensure_strategy(user_id, strategy_id)
-        return self._to_strategy_read(strategy)
+        return self._to_strategy_read(strategy, self._latest_run(strategy))
 
     def update_strategy(
         self, user_id: uuid.UUID, strategy_id: uuid.UUID | str, payload: StrategyUpdate
@@ -141,10 +191,10 @@ class StrategyService:
             strategy.params = payload.params
         if payload.status is not None:
             strategy.status = StrategyStatus(payload.status.value)
-        self.session.add(strategy)
+        self.session.flush()
+        result = self._to_strategy_read(strategy, self._latest_run(strategy))
         self.session.commit()
-        self.session.refresh(strategy)
-        return self._to_strategy_read(strategy)
+        return result
 
     def delete_strategy(self, user_id: uuid.UUID, strategy_id: uuid.UUID | str) -> bool:
         strategy = self._ensure_strategy(user_id, strategy_id)
@@ -162,9 +212,8 @@ class StrategyService:
         existing = self._active_run(strategy)
         if existing is not None:
             raise ValueError("Strategy already running")
-        base_configuration = dict(strategy.params or {})
-        override_configuration = dict(payload.configuration or {})
-        merged_configuration = {**base_configuration, **override_configuration}
+        override_configuration = payload.configuration or {}
+        merged_configuration = {**(strategy.params or {}), **override_configuration}
 
         run = StrategyRun(
             strategy_id=strategy.id,
@@ -172,11 +221,9 @@ class StrategyService:
             status=StrategyRunStatus.running,
             parameters=merged_configuration,
             result_metrics={"pnl": 0.0, "trades": 0},
-            started_at=datetime.utcnow(),
         )
         strategy.status = StrategyStatus.active
         self.session.add(run)
-        self.session.add(strategy)
         self.session.flush()
 
         log_context = {
@@ -191,9 +238,13 @@ class StrategyService:
             message=f"Strategy started in {payload.mode.value} mode",
             context={k: v for k, v in log_context.items() if v is not None},
         )
+        # Build the response from in-memory state so the commit needs no follow-up SELECTs.
+        run_read = self._to_run_read(run)
+        # Captured before commit: the commit expires ``strategy``, and each str() allocates anew.
+        user_key, strategy_key, run_key = str(user_id), str(strategy.id), str(run.id)
+        # Commit before enqueueing: the worker (or the synchronous fallback below) reads the
+        # run through its own session, so it must not race an uncommitted insert.
         self.session.commit()
-        self.session.refresh(run)
-        self.session.refresh(strategy)
 
         context_payload = {
             "mode": payload.mode.value,
@@ -204,31 +255,31 @@ class StrategyService:
             from app.tasks.strategy import trigger_strategy_run  # local import to avoid circular dependency
 
             trigger_strategy_run.delay(
-                user_id=str(user_id),
-                strategy_id=str(strategy.id),
+                user_id=user_key,
+                strategy_id=strategy_key,
                 context=context_payload,
             )
         except Exception as exc:  # noqa: BLE001
             logger.warning(
                 "Falling back to synchronous strategy execution",
-                strategy_id=str(strategy.id),
-                run_id=str(run.id),
+                strategy_id=strategy_key,
+                run_id=run_key,
                 error=str(exc),
             )
             try:
                 trigger_strategy_run.apply(
-                    args=(str(user_id), str(strategy.id)),
+                    args=(user_key, strategy_key),
                     kwargs={"context": context_payload},
                 )
             except Exception as inner_exc:  # noqa: BLE001
                 logger.error(
                     "Failed to execute strategy run",
-                    strategy_id=str(strategy.id),
-                    run_id=str(run.id),
+                    strategy_id=strategy_key,
+                    run_id=run_key,
                     error=str(inner_exc),
                 )
 
-        return self._to_run_read(run)
+        return run_read
 
     def stop_strategy(
         self, user_id: uuid.UUID, strategy_id: uuid.UUID | str, payload: StrategyStopRequest | None = None
@@ -238,12 +289,9 @@ class StrategyService:
         if run is None:
             raise ValueError("Strategy is not running")
         run.status = StrategyRunStatus.stopped
-        run.finished_at = datetime.utcnow()
+        run.finished_at = utcnow()
         run.result_metrics = run.result_metrics or {"pnl": 0.0, "trades": 0}
         strategy.status = StrategyStatus.stopped
-        self.session.add(run)
-        self.session.add(strategy)
-        self.session.flush()
         reason = payload.reason if payload else None
         context = {"reason": reason} if reason else None
         self._append_log(
@@ -253,10 +301,9 @@ class StrategyService:
             message="Strategy stopped",
             context=context,
         )
+        run_read = self._to_run_read(run)
         self.session.commit()
-        self.session.refresh(run)
-        self.session.refresh(strategy)
-        return self._to_run_read(run)
+        return run_read
 
     def record_run_metrics(
         self,
@@ -267,53 +314,78 @@ class StrategyService:
         run = self.session.get(StrategyRun, run_id)
         if run is None or run.strategy_id != strategy_id:
             raise ValueError("Strategy run not found")
-        run.result_metrics = {**(run.result_metrics or {}), **metrics}
+        previous = run.result_metrics or {}
+        # finished_at belongs on the column, not in the JSON metrics.
+        metrics = dict(metrics)
+        finished_at = metrics.pop("finished_at", None)
+        run.result_metrics = {**previous, **metrics}
+        # Apply only the change in this run's totals so repeated updates never double count.
+        bump_strategy_performance(
+            self.session,
+            strategy_id,
+            pnl=_metric(run.result_metrics, "pnl") - _metric(previous, "pnl"),
+            trades=int(_metric(run.result_metrics, "trades") - _metric(previous, "trades")),
+        )
         if metrics.get("status"):
             run.status = StrategyRunStatus(metrics["status"])
-        if metrics.get("finished_at"):
-            run.finished_at = metrics["finished_at"]
-        self.session.add(run)
+            if finished_at is None and run.status in _FINISHED_RUN_STATUSES:
+                finished_at = utcnow()
+        if finished_at is not None:
+            run.finished_at = finished_at
+        run_read = self._to_run_read(run)
         self.session.commit()
-        self.session.refresh(run)
-        return self._to_run_read(run)
+        return run_read
 
     # ------------------------------------------------------------------
     # Logs and analytics
     # ------------------------------------------------------------------
     def get_logs(
-        self, user_id: uuid.UUID, strategy_id: uuid.UUID | str, *, limit: int = 100
+        self,
+        user_id: uuid.UUID,
+        strategy_id: uuid.UUID | str,
+        *,
+        limit: int = 100,
+        include_context: bool = True,
     ) -> StrategyLogListResponse:
         strategy = self._ensure_strategy(user_id, strategy_id)
         stmt = (
             select(StrategyLog)
             .where(StrategyLog.strategy_id == strategy.id)
-            .order_by(StrategyLog.created_at.desc())
+            .order_by(StrategyLog.created_at.desc(), StrategyLog.id.desc())
             .limit(limit)
         )
-        logs: Iterable[StrategyLog] = self.session.execute(stmt).unique().scalars()
-        return StrategyLogListResponse(logs=[self._to_log_read(log) for log in logs])
+        if not include_context:
+            # The JSON context is the bulk of each row; skip fetching and decoding it.
+            stmt = stmt.options(
+                load_only(
+                    StrategyLog.id,
+                    StrategyLog.run_id,
+                    StrategyLog.level,
+                    StrategyLog.message,
+                    StrategyLog.created_at,
+                )
+            )
+        logs: Iterable[StrategyLog] = self.session.execute(stmt).scalars()
+        return StrategyLogListResponse(
+            logs=[self._to_log_read(log, include_context=include_context) for log in logs]
+        )
 
     def get_performance(
         self, user_id: uuid.UUID, strategy_id: uuid.UUID | str
     ) -> StrategyPerformanceResponse:
         strategy = self._ensure_strategy(user_id, strategy_id)
-        stmt = (
+        summary = self.session.get(StrategyPerformanceSummary, strategy.id, populate_existing=True)
+        last_run_stmt = (
             select(StrategyRun)
             .where(StrategyRun.strategy_id == strategy.id)
-            .order_by(StrategyRun.started_at.desc())
+            .order_by(StrategyRun.started_at.desc(), StrategyRun.id.desc())
+            .limit(1)
         )
-        runs: list[StrategyRun] = list(self.session.execute(stmt).unique().scalars())
-        lifetime_pnl = 0.0
-        total_trades = 0
-        for run in runs:
-            metrics = run.result_metrics or {}
-            lifetime_pnl += float(metrics.get("pnl", 0.0))
-            total_trades += int(metrics.get("trades", 0))
-        last_run = runs[0] if runs else None
+        last_run = self.session.execute(last_run_stmt).scalar_one_or_none()
         return StrategyPerformanceResponse(
             strategy_id=strategy.id,
-            lifetime_pnl=lifetime_pnl,
-            total_trades=total_trades,
+            lifetime_pnl=summary.lifetime_pnl if summary else 0.0,
+            total_trades=summary.total_trades if summary else 0,
             last_run=self._to_run_read(last_run) if last_run else None,
         )
 
@@ -335,7 +407,6 @@ class StrategyService:
             level=level,
             message=message,
             context=context,
-            created_at=datetime.utcnow(),
         )
         self.session.add(log)
         return log
@@ -355,13 +426,46 @@ class StrategyService:
         log = self._append_log(
             strategy_id=strategy_id,
             run_id=run_id,
-            level=StrategyLogLevel(level.value),
+            level=_LOG_LEVEL_BY_VALUE[level.value],
             message=message,
             context=context,
         )
+        self.session.flush()
+        log_read = self._to_log_read(log)
         self.session.commit()
-        self.session.refresh(log)
-        return self._to_log_read(log)
+        return log_read
+
+    def append_log_batch(
+        self,
+        *,
+        strategy_id: uuid.UUID,
+        run_id: uuid.UUID | None,
+        items: Iterable[tuple[StrategyLogLevelEnum | str, str, dict[str, Any] | None]],
+        commit: bool = True,
+    ) -> int:
+        """Persist ``(level, message, context)`` tuples with a single INSERT.
+
+        Pass ``commit=False`` to leave the rows in the current transaction for a later commit.
+        """
+        rows = []
+        for level, message, context in items:
+            level_value = level.value if isinstance(level, StrategyLogLevelEnum) else str(level)
+            rows.append(
+                {
+                    "strategy_id": strategy_id,
+                    "run_id": run_id,
+                    "level": _LOG_LEVEL_BY_VALUE.get(level_value, StrategyLogLevel.info),
+                    "message": message,
+                    "context": context,
+                }
+            )
+        if not rows:
+            return 0
+        # Core-style executemany: no identity-map bookkeeping for rows nobody reads back.
+        self.session.execute(insert(StrategyLog), rows)
+        if commit:
+            self.session.commit()
+        return len(rows)
 
 
 __all__ = ["StrategyService"]
@@ -10,6 +10,8 @@ from app.models.strategy import Strategy
 from app.schemas.strategy import StrategyModeEnum, StrategyStartRequest
 from app.services.strategies import StrategyService
 
+_RESERVED_CONTEXT_KEYS = frozenset({"configuration", "mode"})
+
 
 class StrategyDispatcher:
     """Coordinates strategy runs triggered by external events."""
@@ -63,14 +65,9 @@ class StrategyDispatcher:
         context_config = context.get("configuration")
         if isinstance(context_config, dict):
             configuration.update(context_config)
-
-        flattened = {
-            key: value
-            for key, value in context.items()
-            if key not in {"configuration", "mode"}
-        }
-        if flattened:
-            configuration.update(flattened)
+        for key, value in context.items():
+            if key not in _RESERVED_CONTEXT_KEYS:
+                configuration[key] = value
         return configuration
 
     @staticmethod
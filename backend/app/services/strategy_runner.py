@@ -1,8 +1,8 @@
 from __future__ import annotations
 
 import uuid
+from collections import Counter
 from dataclasses import dataclass
-from datetime import datetime
 from typing import Any
 
 from loguru import logger
@@ -14,6 +14,26 @@ from app.schemas.order import ExecutionGroupOrderCreate, OrderSideEnum, OrderTyp
 from app.schemas.strategy import StrategyLogLevelEnum, StrategyModeEnum
 from app.services.brokers import BrokerService
 
+_SIDE_BY_VALUE = {side.value: side for side in OrderSideEnum}
+_ORDER_TYPE_BY_VALUE = {order_type.value: order_type for order_type in OrderTypeEnum}
+
+# Accepted spellings for configuration keys, most preferred first.
+_CONFIG_KEY_ALIASES: dict[str, tuple[str, ...]] = {
+    "execution_group_id": ("execution_group_id", "executionGroupId", "group_id"),
+    "lots": ("lots", "total_lots"),
+    "lot_size": ("lot_size", "lotSize"),
+    "order_type": ("order_type", "orderType"),
+    "take_profit": ("take_profit", "takeProfit"),
+    "stop_loss": ("stop_loss", "stopLoss"),
+    "entry_price": ("entry_price", "entryPrice"),
+    "exit_price": ("exit_price", "exitPrice"),
+}
+_CANONICAL_CONFIG_KEYS: dict[str, tuple[str, int]] = {
+    alias: (canonical, rank)
+    for canonical, aliases in _CONFIG_KEY_ALIASES.items()
+    for rank, alias in enumerate(aliases)
+}
+
 
 @dataclass
 class StrategyRunResult:
@@ -25,9 +45,9 @@ class StrategyRunResult:
 class StrategyRunner:
     """Executes strategy runs in paper/live/backtest modes."""
 
-    def __init__(self, session: Session) -> None:
+    def __init__(self, session: Session, broker_service: BrokerService | None = None) -> None:
         self.session = session
-        self.broker_service = BrokerService(session)
+        self.broker_service = broker_service or BrokerService(session)
 
     def run(
         self,
@@ -50,7 +70,6 @@ class StrategyRunner:
         extras = extras or {}
         base_metrics: dict[str, Any] = {
             "status": "completed",
-            "finished_at": datetime.utcnow(),
             "pnl": float(extras.get("expected_pnl", 0.0)),
             "trades": int(extras.get("trades", 0) or 0),
         }
@@ -124,7 +143,6 @@ class StrategyRunner:
         else:
             raise ValueError(f"Unsupported strategy mode: {mode}")
 
-        base_metrics["finished_at"] = datetime.utcnow()
         return StrategyRunResult(metrics=base_metrics, logs=logs, execution_summary=execution_summary)
 
     def _execute_live_or_paper(
@@ -136,7 +154,8 @@ class StrategyRunner:
         configuration: dict[str, Any],
         mode: StrategyModeEnum,
     ) -> dict[str, Any] | None:
-        execution_group_raw = self._get_value(configuration, "execution_group_id", "executionGroupId", "group_id")
+        configuration = self._normalize_configuration(configuration)
+        execution_group_raw = configuration.get("execution_group_id")
         if execution_group_raw is None:
             raise ValueError("execution_group_id is required for live/paper execution")
 
@@ -147,12 +166,12 @@ class StrategyRunner:
 
         symbol = configuration.get("symbol")
         side_raw = configuration.get("side")
-        lots_raw = self._get_value(configuration, "lots", "total_lots")
-        lot_size_raw = self._get_value(configuration, "lot_size", "lotSize")
-        order_type_raw = self._get_value(configuration, "order_type", "orderType") or OrderTypeEnum.MARKET.value
+        lots_raw = configuration.get("lots")
+        lot_size_raw = configuration.get("lot_size")
+        order_type_raw = configuration.get("order_type") or OrderTypeEnum.MARKET.value
         price = configuration.get("price")
-        take_profit = self._get_value(configuration, "take_profit", "takeProfit")
-        stop_loss = self._get_value(configuration, "stop_loss", "stopLoss")
+        take_profit = configuration.get("take_profit")
+        stop_loss = configuration.get("stop_loss")
 
         if symbol is None:
             raise ValueError("symbol is required for live/paper execution")
@@ -161,15 +180,13 @@ class StrategyRunner:
         if lots_raw is None:
             raise ValueError("lots is required for live/paper execution")
 
-        try:
-            side = OrderSideEnum(str(side_raw).upper())
-        except ValueError as exc:
-            raise ValueError(f"Unsupported order side: {side_raw}") from exc
+        side = _SIDE_BY_VALUE.get(str(side_raw).upper())
+        if side is None:
+            raise ValueError(f"Unsupported order side: {side_raw}")
 
-        try:
-            order_type = OrderTypeEnum(str(order_type_raw).upper())
-        except ValueError as exc:
-            raise ValueError(f"Unsupported order type: {order_type_raw}") from exc
+        order_type = _ORDER_TYPE_BY_VALUE.get(str(order_type_raw).upper())
+        if order_type is None:
+            raise ValueError(f"Unsupported order type: {order_type_raw}")
 
         try:
             lots = int(lots_raw)
@@ -214,10 +231,7 @@ class StrategyRunner:
             strategy_run_id=run.id,
         )
 
-        leg_status_counts: dict[str, int] = {}
-        for leg in response.leg_outcomes:
-            status = (leg.status or "unknown").lower()
-            leg_status_counts[status] = leg_status_counts.get(status, 0) + 1
+        leg_status_counts = dict(Counter((leg.status or "unknown").lower() for leg in response.leg_outcomes))
 
         latency_ms = response.latency.average_ms if response.latency else None
 
@@ -245,22 +259,22 @@ class StrategyRunner:
 
     @staticmethod
     def _simulate_backtest(configuration: dict[str, Any]) -> dict[str, Any]:
+        configuration = StrategyRunner._normalize_configuration(configuration)
         symbol = configuration.get("symbol")
         side_raw = configuration.get("side", "BUY")
-        entry_price_raw = StrategyRunner._get_value(configuration, "entry_price", "entryPrice")
-        exit_price_raw = StrategyRunner._get_value(configuration, "exit_price", "exitPrice")
-        lots_raw = StrategyRunner._get_value(configuration, "lots", "total_lots")
-        lot_size_raw = StrategyRunner._get_value(configuration, "lot_size", "lotSize")
+        entry_price_raw = configuration.get("entry_price")
+        exit_price_raw = configuration.get("exit_price")
+        lots_raw = configuration.get("lots")
+        lot_size_raw = configuration.get("lot_size")
 
         if entry_price_raw is None or exit_price_raw is None:
             raise ValueError("Backtest configuration requires entry_price and exit_price")
         if lots_raw is None:
             raise ValueError("Backtest configuration requires lots")
 
-        try:
-            side = OrderSideEnum(str(side_raw).upper())
-        except ValueError as exc:
-            raise ValueError(f"Unsupported order side for backtest: {side_raw}") from exc
+        side = _SIDE_BY_VALUE.get(str(side_raw).upper())
+        if side is None:
+            raise ValueError(f"Unsupported order side for backtest: {side_raw}")
 
         try:
             entry_price = float(entry_price_raw)
@@ -295,11 +309,17 @@ class StrategyRunner:
         }
 
     @staticmethod
-    def _get_value(mapping: dict[str, Any], *keys: str) -> Any:
-        for key in keys:
-            if key in mapping:
-                return mapping[key]
-        return None
+    def _normalize_configuration(configuration: dict[str, Any]) -> dict[str, Any]:
+        """Fold aliased keys onto their canonical names, keeping the most preferred spelling."""
+        normalized: dict[str, Any] = {}
+        ranks: dict[str, int] = {}
+        for key, value in configuration.items():
+            canonical, rank = _CANONICAL_CONFIG_KEYS.get(key, (key, 0))
+            if ranks.get(canonical, rank + 1) <= rank:
+                continue
+            normalized[canonical] = value
+            ranks[canonical] = rank
+        return normalized
 
 
 __all__ = ["StrategyRunner", "StrategyRunResult"]
@@ -1,9 +1,8 @@
 ﻿from __future__ import annotations
 
 import uuid
-from typing import Iterable
 
-from sqlalchemy import Select, select
+from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
@@ -11,6 +10,15 @@ from app.core.security import get_password_hash, verify_password
 from app.models.user import User, UserRole, UserStatus
 from app.schemas.user import UserCreate, UserRead, UserUpdate, UserRoleEnum, UserStatusEnum
 
+_LIST_BATCH_SIZE = 1000
+_ROLE_MAP = {member: UserRoleEnum(member.value) for member in UserRole}
+_STATUS_MAP = {member: UserStatusEnum(member.value) for member in UserStatus}
+
+
+def _as_uuid(value: uuid.UUID | str) -> uuid.UUID:
+    # Auth dependencies already pass parsed UUIDs; only strings need parsing.
+    return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+
 
 class UserService:
     """Database-backed user service used across API routers."""
@@ -32,9 +40,6 @@ class UserService:
     def _to_schema(self, user: User) -> UserRead:
         return UserRead.model_validate(user)
 
-    def _execute(self, stmt: Select[tuple[User]]) -> Iterable[User]:
-        return self.session.execute(stmt).scalars()
-
     # ------------------------------------------------------------------
     # Public API
     # ------------------------------------------------------------------
@@ -66,24 +71,54 @@ class UserService:
         return self._to_schema(user)
 
     def get_by_email(self, email: str) -> User | None:
+        # Emails are lowercased on every write, so lowering only the argument keeps this a
+        # plain equality on the unique ix_users_email index; never wrap the column in lower().
         stmt = select(User).where(User.email == email.lower()).limit(1)
         return self.session.execute(stmt).scalar_one_or_none()
 
     def get_user_by_id(self, user_id: uuid.UUID | str) -> UserRead | None:
-        user = self.session.get(User, uuid.UUID(str(user_id)))
+        user = self.session.get(User, _as_uuid(user_id))
         if user is None:
             return None
         return self._to_schema(user)
 
     def get_user_model(self, user_id: uuid.UUID | str) -> User | None:
-        return self.session.get(User, uuid.UUID(str(user_id)))
+        return self.session.get(User, _as_uuid(user_id))
 
     def list_users(self) -> list[UserRead]:
-        stmt = select(User).order_by(User.created_at.asc())
-        return [self._to_schema(user) for user in self._execute(stmt)]
+        # Plain column rows: no ORM identity map, and trusted values skip pydantic validation.
+        stmt = (
+            select(
+                User.id,
+                User.name,
+                User.email,
+                User.phone,
+                User.role,
+                User.status,
+                User.is_superuser,
+                User.created_at,
+                User.updated_at,
+            )
+            .order_by(User.created_at.asc())
+            .execution_options(yield_per=_LIST_BATCH_SIZE)
+        )
+        return [
+            UserRead.model_construct(
+                id=row.id,
+                name=row.name,
+                email=row.email,
+                phone=row.phone,
+                role=_ROLE_MAP[row.role],
+                status=_STATUS_MAP[row.status],
+                is_superuser=row.is_superuser,
+                created_at=row.created_at,
+                updated_at=row.updated_at,
+            )
+            for row in self.session.execute(stmt)
+        ]
 
     def update_user(self, user_id: uuid.UUID | str, payload: UserUpdate) -> UserRead | None:
-        user = self.session.get(User, uuid.UUID(str(user_id)))
+        user = self.session.get(User, _as_uuid(user_id))
         if user is None:
             return None
         if payload.name is not None:
@@ -100,13 +135,14 @@ class UserService:
             user.is_superuser = payload.is_superuser
         if payload.password:
             user.password_hash = get_password_hash(payload.password)
-        self.session.add(user)
+        # Every column is set in Python, so the flushed object is complete; no refresh needed.
+        self.session.flush()
+        user_read = self._to_schema(user)
         self.session.commit()
-        self.session.refresh(user)
-        return self._to_schema(user)
+        return user_read
 
     def delete_user(self, user_id: uuid.UUID | str) -> bool:
-        user = self.session.get(User, uuid.UUID(str(user_id)))
+        user = self.session.get(User, _as_uuid(user_id))
         if user is None:
             return False
         self.session.delete(user)
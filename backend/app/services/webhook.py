@@ -1,14 +1,22 @@
 from __future__ import annotations
 
 import hmac
+import json
+import os
+import threading
+import time
 import uuid
+from collections import OrderedDict
 from datetime import datetime
 from typing import Any
 
+import redis
+from redis.backoff import ExponentialBackoff
+from redis.retry import Retry
 from fastapi import BackgroundTasks
 from loguru import logger
 
-
+from app.core.config import settings
 from app.schemas.webhook import (
     WebhookConnectorCreate,
     WebhookConnectorRead,
@@ -16,15 +24,46 @@ from app.schemas.webhook import (
     WebhookProvider,
 )
 
+_DUMMY_KEY = os.urandom(32)
+_CONNECTOR_KEY_PREFIX = "webhook:connectors:"
+_CONNECTOR_OWNERS_KEY = "webhook:connector-owners"
+_LOCAL_CACHE_SIZE = 256
+_LOCAL_CACHE_TTL_SECONDS = 5.0
+
+
+def _canonical_payload(payload: dict[str, Any]) -> bytes:
+    """Serialise a webhook payload as compact, key-sorted UTF-8 JSON for signing.
+
+    Always uses the stdlib encoder: the signed bytes must not depend on which JSON library is installed.
+    """
+    return json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
 
 class WebhookService:
-    """In-memory prototype for managing webhook connectors and events."""
+    """Manage webhook connectors and events.
+
+    Connectors live in Redis (``webhook:connectors:{user_id}`` hashes plus an id -> owner hash for
+    dispatch lookups) so every API worker shares one view. Without a client the service keeps them
+    in process memory (``WEBHOOK_CONNECTOR_STORE=memory``), which is only suitable for single-worker
+    setups and tests.
 
-    def __init__(self) -> None:
+    Dispatch lookups are cached per process for up to ``_LOCAL_CACHE_TTL_SECONDS``. Deleting a
+    connector only evicts the cache of the worker that served the delete, so other workers may keep
+    accepting events for it until their cached entry expires.
+    """
+
+    def __init__(self, redis_client: redis.Redis | None = None, *, ttl_seconds: int | None = None) -> None:
+        self._redis = redis_client
+        self._ttl_seconds = ttl_seconds
         self._connectors: dict[uuid.UUID, WebhookConnectorRead] = {}
+        self._cache: OrderedDict[uuid.UUID, tuple[float, WebhookConnectorRead]] = OrderedDict()
+        self._cache_lock = threading.Lock()
 
     def list_connectors(self, user_id: uuid.UUID) -> list[WebhookConnectorRead]:
-        return [connector for connector in self._connectors.values() if connector.user_id == user_id]
+        if self._redis is None:
+            return [connector for connector in self._connectors.values() if connector.user_id == user_id]
+        raw = self._redis.hgetall(f"{_CONNECTOR_KEY_PREFIX}{user_id}")
+        return [WebhookConnectorRead.model_validate_json(value) for value in raw.values()]
 
     def create_connector(self, user_id: uuid.UUID, payload: WebhookConnectorCreate) -> WebhookConnectorRead:
         connector_id = uuid.uuid4()
@@ -34,23 +73,70 @@ class WebhookService:
             created_at=datetime.utcnow(),
             **payload.model_dump(),
         )
-        self._connectors[connector_id] = connector
+        if self._redis is None:
+            self._connectors[connector_id] = connector
+            return connector
+
+        user_key = f"{_CONNECTOR_KEY_PREFIX}{user_id}"
+        pipe = self._redis.pipeline()
+        pipe.hset(user_key, str(connector_id), connector.model_dump_json())
+        pipe.hset(_CONNECTOR_OWNERS_KEY, str(connector_id), str(user_id))
+        if self._ttl_seconds:
+            pipe.expire(user_key, self._ttl_seconds)
+        pipe.execute()
         return connector
 
     def delete_connector(self, user_id: uuid.UUID, connector_id: uuid.UUID) -> bool:
-        connector = self._connectors.get(connector_id)
-        if connector is None or connector.user_id != user_id:
+        if self._redis is None:
+            connector = self._connectors.get(connector_id)
+            if connector is None or connector.user_id != user_id:
+                return False
+            del self._connectors[connector_id]
+            return True
+
+        with self._cache_lock:
+            self._cache.pop(connector_id, None)
+        removed = self._redis.hdel(f"{_CONNECTOR_KEY_PREFIX}{user_id}", str(connector_id))
+        if not removed:
             return False
-        del self._connectors[connector_id]
+        self._redis.hdel(_CONNECTOR_OWNERS_KEY, str(connector_id))
         return True
 
+    def _get_connector(self, connector_id: uuid.UUID) -> WebhookConnectorRead | None:
+        if self._redis is None:
+            return self._connectors.get(connector_id)
+
+        now = time.monotonic()
+        with self._cache_lock:
+            cached = self._cache.get(connector_id)
+            if cached is not None and cached[0] > now:
+                self._cache.move_to_end(connector_id)
+                return cached[1]
+
+        owner = self._redis.hget(_CONNECTOR_OWNERS_KEY, str(connector_id))
+        if owner is None:
+            return None
+        raw = self._redis.hget(f"{_CONNECTOR_KEY_PREFIX}{owner.decode()}", str(connector_id))
+        if raw is None:
+            # The owner's hash expired or the connector was deleted elsewhere; drop the stale pointer.
+            self._redis.hdel(_CONNECTOR_OWNERS_KEY, str(connector_id))
+            return None
+        connector = WebhookConnectorRead.model_validate_json(raw)
+
+        with self._cache_lock:
+            self._cache[connector_id] = (now + _LOCAL_CACHE_TTL_SECONDS, connector)
+            self._cache.move_to_end(connector_id)
+            while len(self._cache) > _LOCAL_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return connector
+
     def dispatch_event(
         self,
         connector_id: uuid.UUID,
         event: WebhookEventIn,
         background_tasks: BackgroundTasks,
     ) -> None:
-        connector = self._connectors.get(connector_id)
+        connector = self._get_connector(connector_id)
         if connector is None or not connector.is_active:
             raise KeyError("Connector not found")
         if not self._validate_event(connector, event):
@@ -60,15 +146,18 @@ class WebhookService:
         return connector
 
     def _validate_event(self, connector: WebhookConnectorRead, event: WebhookEventIn) -> bool:
-        if connector.secret is None:
-            return True
+        # Always hash and compare so missing secrets or signatures do not show up as faster responses.
         candidate = event.signature or (event.headers or {}).get("X-Webhook-Signature")
-        if candidate is None:
+        secret_bytes = connector.secret.encode("utf-8") if connector.secret is not None else _DUMMY_KEY
+        try:
+            payload_bytes = _canonical_payload(event.payload)
+        except (TypeError, ValueError):
             return False
-        payload_bytes = str(event.payload).encode("utf-8")
-        secret_bytes = connector.secret.encode("utf-8")
-        expected = hmac.new(secret_bytes, payload_bytes, "sha256").hexdigest()
-        return hmac.compare_digest(expected, candidate)
+        expected = hmac.new(secret_bytes, payload_bytes, "sha256").hexdigest().encode("ascii")
+        matches = hmac.compare_digest(expected, (candidate or "").encode("utf-8"))
+        if connector.secret is None:
+            return True
+        return matches and candidate is not None
 
     @staticmethod
     def _handle_event(connector: WebhookConnectorRead, event: WebhookEventIn) -> None:
@@ -83,4 +172,35 @@ class WebhookService:
         )
 
 
-webhook_service = WebhookService()
+_service: WebhookService | None = None
+_service_lock = threading.Lock()
+
+
+def _connector_store_client() -> redis.Redis | None:
+    """Return the Redis client for the connector store, or None for the explicit memory store.
+
+    The client connects on first command and reconnects (with a few backed-off retries) after an
+    outage, so an unreachable Redis fails the request that hit it instead of quietly moving this
+    worker onto a private in-memory view.
+    """
+    if settings.webhook_connector_store == "memory":
+        return None
+    return redis.Redis.from_url(
+        settings.redis_url,
+        socket_connect_timeout=1,
+        retry=Retry(ExponentialBackoff(cap=1), 3),
+        retry_on_error=[redis.ConnectionError, redis.TimeoutError],
+    )
+
+
+def get_webhook_service() -> WebhookService:
+    """Return the process-wide webhook service, building it on first use."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = WebhookService(
+                    _connector_store_client(),
+                    ttl_seconds=settings.webhook_connector_ttl_seconds,
+                )
+    return _service
@@ -1,22 +1,60 @@
 from __future__ import annotations
 
 import uuid
-from app.utils.dt import utcnow
+from collections.abc import Iterator
+from contextlib import contextmanager
 
 from loguru import logger
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, scoped_session
 
 from app.celery_app import celery_app
 from app.db.session import SessionLocal
 from app.models.strategy import Strategy
 from app.models.strategy_run import StrategyRun
-from app.schemas.strategy import StrategyLogLevelEnum, StrategyModeEnum
+from app.schemas.strategy import StrategyModeEnum
 from app.services.strategy_dispatcher import StrategyDispatcher
 from app.services.strategy_runner import StrategyRunner
 from app.services.strategies import StrategyService
 
-
-@celery_app.task(name="strategy.run", bind=True, autoretry_for=(Exception,), retry_backoff=True, max_retries=3)
+# One session per worker thread; tasks close it on exit but keep the object for reuse.
+_task_session = scoped_session(SessionLocal)
+
+
+@contextmanager
+def _task_scope() -> Iterator[Session]:
+    session = _task_session()
+    if session.info.get("in_task"):
+        # The synchronous fallback in StrategyService.start_strategy can nest a run
+        # inside another; give it a private session so it cannot close ours.
+        with SessionLocal() as nested:
+            yield nested
+        return
+    session.info["in_task"] = True
+    try:
+        with session:
+            yield session
+    finally:
+        session.info["in_task"] = False
+
+
+def _task_services(session: Session) -> tuple[StrategyDispatcher, StrategyService, StrategyRunner]:
+    """Return the service graph bound to ``session``, building it on the first task only."""
+    services = session.info.get("strategy_task_services")
+    if services is None:
+        dispatcher = StrategyDispatcher(session)
+        services = (dispatcher, dispatcher.strategy_service, StrategyRunner(session))
+        session.info["strategy_task_services"] = services
+    return services
+
+
+@celery_app.task(
+    name="strategy.run",
+    bind=True,
+    acks_late=True,
+    autoretry_for=(Exception,),
+    retry_backoff=True,
+    max_retries=3,
+)
 def trigger_strategy_run(self, user_id: str, strategy_id: str | None, context: dict | None = None) -> str:
     logger.info("[celery] dispatching strategy run", user_id=user_id, strategy_id=strategy_id)
     if strategy_id is None:
@@ -27,8 +65,8 @@ def trigger_strategy_run(self, user_id: str, strategy_id: str | None, context: d
     user_uuid = uuid.UUID(user_id)
     strategy_uuid = uuid.UUID(strategy_id)
 
-    with SessionLocal() as session:  # type: Session
-        dispatcher = StrategyDispatcher(session)
+    with _task_scope() as session:
+        dispatcher, svc, runner = _task_services(session)
         run_read = dispatcher.dispatch(
             user_id=user_uuid,
             strategy_id=strategy_uuid,
@@ -43,7 +81,6 @@ def trigger_strategy_run(self, user_id: str, strategy_id: str | None, context: d
             )
             return "skipped"
 
-        svc = StrategyService(session)
         strategy = session.get(Strategy, strategy_uuid)
         run_entity = session.get(StrategyRun, run_read.id)
 
@@ -58,7 +95,6 @@ def trigger_strategy_run(self, user_id: str, strategy_id: str | None, context: d
                 run_id=run_read.id,
                 metrics={
                     "status": "failed",
-                    "finished_at": utcnow(),
                     "error": "Strategy/run entity missing after dispatch",
                 },
             )
@@ -67,8 +103,6 @@ def trigger_strategy_run(self, user_id: str, strategy_id: str | None, context: d
         mode = StrategyModeEnum(run_entity.mode.value)
         configuration = dict(run_entity.parameters or {})
 
-        runner = StrategyRunner(session)
-
         try:
             result = runner.run(
                 strategy=strategy,
@@ -90,25 +124,18 @@ def trigger_strategy_run(self, user_id: str, strategy_id: str | None, context: d
                 run_id=run_entity.id,
                 metrics={
                     "status": "failed",
-                    "finished_at": utcnow(),
                     "error": str(exc),
                 },
             )
             raise
 
-        for level, message, log_context in result.logs:
-            level_value = level.value if isinstance(level, StrategyLogLevelEnum) else str(level)
-            try:
-                level_enum = StrategyLogLevelEnum(level_value)
-            except ValueError:
-                level_enum = StrategyLogLevelEnum.info
-            svc.log_event(
-                strategy_id=strategy_uuid,
-                run_id=run_entity.id,
-                message=message,
-                level=level_enum,
-                context=log_context,
-            )
+        # Logs ride in the same transaction as the final metrics: one commit finalises the run.
+        svc.append_log_batch(
+            strategy_id=strategy_uuid,
+            run_id=run_entity.id,
+            items=result.logs,
+            commit=False,
+        )
 
         try:
             svc.record_run_metrics(
@@ -1,19 +1,38 @@
 from __future__ import annotations
 
 import json
+import os
 import threading
-from datetime import datetime, timedelta
+import time
+from datetime import timedelta
+from email.utils import formatdate
 from pathlib import Path
-from typing import Any, Iterable, Mapping
+from typing import IO, Any, Iterable, Iterator, Mapping
 
 import httpx
 
+try:
+    import ijson
+except ModuleNotFoundError:  # pragma: no cover - optional dependency fallback
+    ijson = None  # type: ignore[assignment]
+
+try:
+    import orjson
+except ModuleNotFoundError:  # pragma: no cover - optional dependency fallback
+    orjson = None  # type: ignore[assignment]
+
 from app.core.config import PROJECT_ROOT
 
 MASTER_URL = "https://margincalculator.angelone.in/OpenAPI_File/files/OpenAPIScripMaster.json"
 CACHE_DIR = PROJECT_ROOT / "data"
 CACHE_PATH = CACHE_DIR / "angel_openapi_master.json"
 CACHE_MAX_AGE = timedelta(hours=24)
+_CACHE_MAX_AGE_SECONDS = CACHE_MAX_AGE.total_seconds()
+
+_SYMBOL_KEYS = ("tradingsymbol", "symbol", "symbolname", "name")
+_TOKEN_KEYS = ("symboltoken", "symbolToken", "token", "instrument_token")
+_EXCHANGE_KEYS = ("exch_seg", "exchange", "exchangeSegment", "segment")
+_INSTRUMENT_TYPE_KEYS = ("instrumenttype", "instrument_type", "instrumentType")
 
 
 class AngelInstrumentMaster:
@@ -24,8 +43,7 @@ class AngelInstrumentMaster:
         self.cache_path = cache_path
         self.auto_refresh = auto_refresh
         self._lock = threading.Lock()
-        self._records: list[dict[str, Any]] | None = None
-        self._index: dict[tuple[str, str], dict[str, Any]] = {}
+        self._index: dict[str, dict[str, Any]] = {}
         self._loaded_mtime: float | None = None
 
     # ------------------------------------------------------------------
@@ -35,22 +53,42 @@ class AngelInstrumentMaster:
         """Download the master file if missing or stale."""
 
         with self._lock:
-            if not force and self.cache_path.exists() and not self._is_stale(self.cache_path):
+            stat = self._stat_or_none()
+            cached = stat is not None
+            if not force and cached and not self._is_stale(stat):
                 return
             self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            headers: dict[str, str] = {}
+            etag_path = self.cache_path.with_name(self.cache_path.name + ".etag")
+            if cached and not force:
+                # The master rarely changes intraday; let the server answer 304 instead of resending it.
+                headers["If-Modified-Since"] = formatdate(stat.st_mtime, usegmt=True)
+                if etag_path.exists():
+                    headers["If-None-Match"] = etag_path.read_text().strip()
             try:
-                response = httpx.get(self.url, timeout=30.0)
+                response = httpx.get(self.url, headers=headers, timeout=30.0)
+                if response.status_code == httpx.codes.NOT_MODIFIED:
+                    os.utime(self.cache_path, None)
+                    if self._loaded_mtime == stat.st_mtime:
+                        # Same content, new mtime: keep the loaded index valid.
+                        self._loaded_mtime = self.cache_path.stat().st_mtime
+                    return
                 response.raise_for_status()
             except httpx.HTTPError as exc:  # pragma: no cover - network failure
-                if self.cache_path.exists():
+                if cached:
                     return
                 raise RuntimeError(
                     "Unable to download Angel One scrip master. "
                     "Download it manually from the Angel margin calculator website."
                 ) from exc
             self.cache_path.write_bytes(response.content)
-            self._records = None
-            self._index.clear()
+            etag = response.headers.get("ETag")
+            if etag:
+                etag_path.write_text(etag)
+            else:
+                etag_path.unlink(missing_ok=True)
+            # Only invalidate the mtime: readers keep the previous index until the rebuild publishes
+            # the new one, instead of briefly seeing an empty dict.
             self._loaded_mtime = None
 
     def refresh(self) -> None:
@@ -65,85 +103,107 @@ class AngelInstrumentMaster:
             return None
         symbol_key = symbol.strip().upper()
         exchange_key = (exchange or "").strip().upper()
-        records = self._load_records()
-        self._build_index(records)
-
-        direct = self._index.get((symbol_key, exchange_key))
-        if direct:
-            return direct
-
-        if exchange_key:
-            alt = self._index.get((symbol_key, ""))
-            if alt:
-                return alt
-
-        if "-" in symbol_key:
-            base = symbol_key.split("-", 1)[0]
-            alt = self._index.get((base, exchange_key)) or self._index.get((base, ""))
-            if alt:
-                return alt
-        else:
-            equity_key = f"{symbol_key}-EQ"
-            alt = self._index.get((equity_key, exchange_key)) or self._index.get((equity_key, ""))
-            if alt:
-                return alt
+        index = self._current_index()
 
-        return None
+        # The index already carries base/-EQ aliases with and without an exchange.
+        match = index.get(f"{symbol_key}|{exchange_key}") or index.get(f"{symbol_key}|")
+        if match or "-" not in symbol_key:
+            return match
+        # Series suffixes the master does not list (e.g. "-BE") fall back to the base symbol.
+        base = symbol_key.split("-", 1)[0]
+        return index.get(f"{base}|{exchange_key}") or index.get(f"{base}|")
 
     # ------------------------------------------------------------------
     # Internal helpers
     # ------------------------------------------------------------------
-    def _load_records(self) -> list[dict[str, Any]]:
+    def _current_index(self) -> dict[str, dict[str, Any]]:
+        # Lock-free fast path: once loaded, readers only compare the cache file's mtime.
+        current_mtime = self._current_mtime()
+        if current_mtime is not None and self._loaded_mtime == current_mtime:
+            return self._index
+
+        # ensure_cache takes the lock itself, so it has to run before we acquire it.
+        if self.auto_refresh:
+            self.ensure_cache()
         with self._lock:
             current_mtime = self._current_mtime()
-            if self._records is not None and self._loaded_mtime == current_mtime:
-                return self._records
-
-            if self.auto_refresh:
-                self.ensure_cache()
-            elif not self.cache_path.exists():
+            if current_mtime is not None and self._loaded_mtime == current_mtime:
+                return self._index
+            if current_mtime is None:
                 raise RuntimeError(
                     "Angel One scrip master cache not found. Run the update script or enable auto_refresh."
                 )
 
-            data = self.cache_path.read_text(encoding="utf-8")
-            records = json.loads(data)
-            if not isinstance(records, list):
-                raise RuntimeError("Angel One scrip master JSON is malformed")
-            self._records = [item for item in records if isinstance(item, Mapping)]
-            self._index.clear()
+            # Index straight off the parser; the raw records are never held as a list.
+            with self.cache_path.open("rb") as fh:
+                self._index = self._build_index(self._iter_records(fh))
             self._loaded_mtime = current_mtime
-            return self._records
+            return self._index
 
-    def _build_index(self, records: Iterable[Mapping[str, Any]]) -> None:
-        if self._index:
-            return
+    @staticmethod
+    def _iter_records(fh: IO[bytes]) -> Iterator[Mapping[str, Any]]:
+        if ijson is not None:
+            # ijson silently yields nothing for a non-array document; check the top-level token first.
+            head = fh.read(64).lstrip(b"\xef\xbb\xbf \t\r\n")
+            fh.seek(0)
+            if not head.startswith(b"["):
+                raise RuntimeError("Angel One scrip master JSON is malformed")
+            records: Iterable[Any] = ijson.items(fh, "item", use_float=True)
+        else:
+            data = fh.read()
+            records = orjson.loads(data) if orjson is not None else json.loads(data)
+            if not isinstance(records, list):
+                raise RuntimeError("Angel One scrip master JSON is malformed")
         for record in records:
-            tradingsymbol = self._extract_symbol(record)
-            token = self._extract_token(record)
-            exchange = self._extract_exchange(record)
-            if not tradingsymbol or not token:
+            if isinstance(record, Mapping):
+                yield record
+
+    def _build_index(self, records: Iterable[Mapping[str, Any]]) -> dict[str, dict[str, Any]]:
+        # Fill a local dict and publish it once; readers never see a half-built index.
+        # Keys are packed "SYMBOL|EXCHANGE" strings ("SYMBOL|" for any exchange).
+        index: dict[str, dict[str, Any]] = {}
+        # "SYMBOL|" keys currently held by an alias rather than a record with that exact symbol.
+        alias_only: set[str] = set()
+        extract_symbol = self._extract_symbol
+        extract_token = self._extract_token
+        extract_exchange = self._extract_exchange
+        extract_field = self._extract_field
+        for record in records:
+            tradingsymbol = extract_symbol(record)
+            if not tradingsymbol:
+                continue
+            token = extract_token(record)
+            if not token:
                 continue
+            exchange = extract_exchange(record)
             payload: dict[str, Any] = {
                 "tradingsymbol": tradingsymbol,
                 "symbol_token": token,
-                "exchange": exchange or "",
+                "exchange": exchange,
             }
-            instrument_type = self._extract_field(record, ["instrumenttype", "instrument_type", "instrumentType"])
+            instrument_type = extract_field(record, _INSTRUMENT_TYPE_KEYS)
             if instrument_type:
                 payload["instrument_type"] = instrument_type
 
-            key = (tradingsymbol, exchange or "")
-            self._index[key] = payload
+            index[f"{tradingsymbol}|{exchange}"] = payload
             if "-" in tradingsymbol:
-                base = tradingsymbol.split("-", 1)[0]
-                self._index.setdefault((base, exchange or ""), payload)
+                alias = tradingsymbol.split("-", 1)[0]
             else:
-                self._index.setdefault((f"{tradingsymbol}-EQ", exchange or ""), payload)
-            self._index.setdefault((tradingsymbol, ""), payload)
+                alias = f"{tradingsymbol}-EQ"
+            index.setdefault(f"{alias}|{exchange}", payload)
+            # An exact symbol outranks any alias under the any-exchange key, even one seen earlier.
+            any_exchange_key = f"{tradingsymbol}|"
+            if any_exchange_key not in index or any_exchange_key in alias_only:
+                index[any_exchange_key] = payload
+                alias_only.discard(any_exchange_key)
+            alias_key = f"{alias}|"
+            if alias_key not in index:
+                index[alias_key] = payload
+                alias_only.add(alias_key)
+        return index
 
     def _extract_symbol(self, record: Mapping[str, Any]) -> str:
-        for key in ("tradingsymbol", "symbol", "symbolname", "name"):
+        for key in _SYMBOL_KEYS:
             value = record.get(key)
             if value:
                 symbol = str(value).strip().upper()
@@ -152,7 +212,7 @@ class AngelInstrumentMaster:
         return ""
 
     def _extract_token(self, record: Mapping[str, Any]) -> str:
-        for key in ("symboltoken", "symbolToken", "token", "instrument_token"):
+        for key in _TOKEN_KEYS:
             value = record.get(key)
             if value is not None:
                 token = str(value).strip()
@@ -161,7 +221,7 @@ class AngelInstrumentMaster:
         return ""
 
     def _extract_exchange(self, record: Mapping[str, Any]) -> str:
-        for key in ("exch_seg", "exchange", "exchangeSegment", "segment"):
+        for key in _EXCHANGE_KEYS:
             value = record.get(key)
             if value:
                 exchange = str(value).strip().upper()
@@ -179,14 +239,21 @@ class AngelInstrumentMaster:
                     return text
         return None
 
-    def _is_stale(self, path: Path) -> bool:
-        mtime = datetime.fromtimestamp(path.stat().st_mtime)
-        return datetime.utcnow() - mtime > CACHE_MAX_AGE
+    @staticmethod
+    def _is_stale(stat: os.stat_result) -> bool:
+        # Both sides are epoch seconds, so no timezone conversion is involved.
+        return time.time() - stat.st_mtime > _CACHE_MAX_AGE_SECONDS
+
+    def _stat_or_none(self) -> os.stat_result | None:
+        # A single stat() answers both "does it exist" and "how old is it".
+        try:
+            return os.stat(self.cache_path)
+        except FileNotFoundError:
+            return None
 
     def _current_mtime(self) -> float | None:
-        if not self.cache_path.exists():
-            return None
-        return self.cache_path.stat().st_mtime
+        stat = self._stat_or_none()
+        return stat.st_mtime if stat is not None else None
 
 
 _master_instance: AngelInstrumentMaster | None = None
@@ -1,18 +1,22 @@
 from __future__ import annotations
 
 import base64
+import functools
 import hashlib
 import hmac
 import json
 import os
 import struct
-import threading
 from typing import Any, Mapping, Protocol
 
 try:
+    from cryptography.exceptions import InvalidTag  # type: ignore
     from cryptography.fernet import Fernet, InvalidToken  # type: ignore
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM  # type: ignore
 except ModuleNotFoundError:  # pragma: no cover - optional dependency fallback
+    AESGCM = None  # type: ignore[assignment]
     Fernet = None  # type: ignore[assignment]
+    InvalidTag = Exception  # type: ignore[assignment]
     InvalidToken = Exception  # type: ignore[assignment]
 
 from app.core.config import settings
@@ -39,22 +43,27 @@ class _FallbackCipher:  # pragma: no cover - exercised via runtime fallback
         self._key = key_bytes
 
     def _keystream(self, nonce: bytes, length: int) -> bytes:
-        blocks: list[bytes] = []
-        counter = 0
-        produced = 0
-        while produced < length:
-            counter_bytes = struct.pack(">Q", counter)
-            digest = hashlib.sha256(self._key + nonce + counter_bytes).digest()
-            blocks.append(digest)
-            produced += len(digest)
-            counter += 1
-        stream = b"".join(blocks)[:length]
-        return stream
+        # The key + nonce prefix is hashed once; each block only feeds in its counter.
+        base = hashlib.sha256(self._key)
+        base.update(nonce)
+        stream = bytearray(length + 31)
+        for counter, offset in enumerate(range(0, length, 32)):
+            block = base.copy()
+            block.update(struct.pack(">Q", counter))
+            stream[offset:offset + 32] = block.digest()
+        return bytes(stream[:length])
+
+    @staticmethod
+    def _xor(data: bytes, keystream: bytes) -> bytes:
+        # Big-int XOR runs in C instead of one interpreter step per byte.
+        length = len(data)
+        if not length:
+            return b""
+        return (int.from_bytes(data, "big") ^ int.from_bytes(keystream, "big")).to_bytes(length, "big")
 
     def encrypt(self, data: bytes) -> bytes:
         nonce = os.urandom(16)
-        keystream = self._keystream(nonce, len(data))
-        ciphertext = bytes(a ^ b for a, b in zip(data, keystream))
+        ciphertext = self._xor(data, self._keystream(nonce, len(data)))
         tag = hmac.new(self._key, nonce + ciphertext, hashlib.sha256).digest()
         token = base64.urlsafe_b64encode(nonce + ciphertext + tag)
         return token
@@ -69,44 +78,63 @@ class _FallbackCipher:  # pragma: no cover - exercised via runtime fallback
         expected_tag = hmac.new(self._key, nonce + ciphertext, hashlib.sha256).digest()
         if not hmac.compare_digest(tag, expected_tag):
             raise CredentialDecryptError("Credential signature mismatch")
-        keystream = self._keystream(nonce, len(ciphertext))
-        plaintext = bytes(a ^ b for a, b in zip(ciphertext, keystream))
-        return plaintext
-
-
-_cipher_lock = threading.Lock()
-_cipher: _CipherLike | None = None
+        return self._xor(ciphertext, self._keystream(nonce, len(ciphertext)))
 
 
+@functools.cache
 def _derive_key(secret: str) -> bytes:
     digest = hashlib.sha256(secret.encode("utf-8")).digest()
     return base64.urlsafe_b64encode(digest)
 
 
+# AES-GCM tokens are "v2." + urlsafe-b64(nonce || ciphertext+tag). "." never occurs in
+# base64url, so older Fernet / fallback tokens can still be told apart and decrypted.
+_AESGCM_PREFIX = "v2."
+_AESGCM_NONCE_SIZE = 12
+
+
+@functools.cache
+def _get_aead() -> Any:
+    # Domain-separated from the Fernet key so the two schemes never share key material.
+    raw_key = hmac.new(settings.secret_key.encode("utf-8"), b"broker-credentials/aes-gcm", hashlib.sha256).digest()
+    return AESGCM(raw_key)
+
+
+@functools.cache
 def _get_cipher() -> _CipherLike:
-    global _cipher
-    if _cipher is None:
-        with _cipher_lock:
-            if _cipher is None:
-                key = _derive_key(settings.secret_key)
-                if Fernet is not None:
-                    _cipher = Fernet(key)  # type: ignore[assignment]
-                else:  # pragma: no cover - fallback path
-                    raw_key = hashlib.sha256(settings.secret_key.encode("utf-8")).digest()
-                    _cipher = _FallbackCipher(raw_key)
-    return _cipher
+    if Fernet is None:  # pragma: no cover - fallback path
+        raw_key = hashlib.sha256(settings.secret_key.encode("utf-8")).digest()
+        return _FallbackCipher(raw_key)
+    return Fernet(_derive_key(settings.secret_key))  # type: ignore[return-value]
 
 
 def encrypt_credentials(payload: Mapping[str, Any]) -> str:
-    serialized = json.dumps(payload, separators=(",", ":"), sort_keys=True, ensure_ascii=False)
-    token = _get_cipher().encrypt(serialized.encode("utf-8"))
+    serialized = json.dumps(payload, separators=(",", ":"), sort_keys=True, ensure_ascii=False).encode("utf-8")
+    if AESGCM is not None:
+        nonce = os.urandom(_AESGCM_NONCE_SIZE)
+        sealed = _get_aead().encrypt(nonce, serialized, None)
+        return _AESGCM_PREFIX + base64.urlsafe_b64encode(nonce + sealed).decode("ascii")
+    token = _get_cipher().encrypt(serialized)  # pragma: no cover - fallback path
     return token.decode("utf-8") if isinstance(token, bytes) else token
 
 
+def _decrypt_aesgcm(token: str) -> bytes:
+    if AESGCM is None:  # pragma: no cover - fallback path
+        raise CredentialDecryptError("AES-GCM credentials require the cryptography package")
+    raw = base64.urlsafe_b64decode(token[len(_AESGCM_PREFIX):])
+    if len(raw) <= _AESGCM_NONCE_SIZE:
+        raise CredentialDecryptError("Stored credential token malformed")
+    return _get_aead().decrypt(raw[:_AESGCM_NONCE_SIZE], raw[_AESGCM_NONCE_SIZE:], None)
+
+
 def decrypt_credentials(token: str) -> dict[str, Any]:
     try:
-        decrypted_bytes = _get_cipher().decrypt(token.encode("utf-8"))
-    except InvalidToken as exc:  # type: ignore[arg-type]
+        if token.startswith(_AESGCM_PREFIX):
+            decrypted_bytes = _decrypt_aesgcm(token)
+        else:
+            # Tokens written before AES-GCM (Fernet or the fallback cipher).
+            decrypted_bytes = _get_cipher().decrypt(token.encode("utf-8"))
+    except (InvalidTag, InvalidToken) as exc:  # type: ignore[misc]
         raise CredentialDecryptError("Unable to decrypt stored broker credentials") from exc
     except CredentialDecryptError:
         raise
@@ -1,10 +1,17 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 
-__all__ = ["utcnow"]
+__all__ = ["utc_date", "utcnow"]
 
 
 def utcnow() -> datetime:
     """Return a timezone-aware UTC timestamp."""
     return datetime.now(timezone.utc)
+
+
+def utc_date(value: datetime) -> date:
+    """Return the UTC calendar date of ``value``; naive datetimes are taken to be UTC already."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.date()
@@ -3,11 +3,19 @@
 from __future__ import annotations
 
 import asyncio
+import signal
 
 
 async def main() -> None:
-    while True:
-        await asyncio.sleep(60)
+    # Park on an event instead of a sleep loop; SIGINT/SIGTERM set it for a clean exit.
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):  # pragma: no cover - e.g. Windows event loops
+            pass
+    await stop.wait()
 
 
 if __name__ == "__main__":
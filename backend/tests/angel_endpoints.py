@@ -0,0 +1,13 @@
+"""Angel One SmartAPI paths asserted by the adapter tests.
+
+Kept as literals rather than read from ``AngelAdapter`` so a changed endpoint still fails a test.
+"""
+
+LOGIN = "/rest/auth/angelbroking/user/v1/loginByPassword"
+REFRESH = "/rest/auth/angelbroking/jwt/v1/generateTokens"
+PROFILE = "/rest/secure/angelbroking/user/v1/getProfile"
+LOGOUT = "/rest/secure/angelbroking/user/v1/logout"
+PLACE_ORDER = "/rest/secure/angelbroking/order/v1/placeOrder"
+POSITIONS = "/rest/secure/angelbroking/order/v1/getPosition"
+HOLDINGS = "/rest/secure/angelbroking/portfolio/v1/getAllHolding"
+CONVERT = "/rest/secure/angelbroking/order/v1/convertPosition"
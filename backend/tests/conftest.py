@@ -1,10 +1,23 @@
 from __future__ import annotations
 
+import copy
+import functools
+import json
+import re
+import uuid
+from contextlib import contextmanager
+from typing import Any
+
+import httpx
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 from sqlalchemy.ext.compiler import compiles
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+
+_SAVEPOINT_STATEMENT = re.compile(r"\s*(SAVEPOINT|RELEASE SAVEPOINT|ROLLBACK TO SAVEPOINT)\b", re.IGNORECASE)
 
 
 @compiles(PGUUID, "sqlite")
@@ -12,22 +25,336 @@ def _compile_uuid(element, compiler, **kwargs) -> str:  # pragma: no cover - dia
     return "CHAR(36)"
 
 
-@pytest.fixture()
-def session():
-    """Provide an isolated in-memory database session for tests."""
+@pytest.fixture(scope="session")
+def engine():
+    """Create the in-memory schema once per run; tests isolate through rolled-back transactions."""
 
     from app import models  # noqa: F401  Ensures all model metadata is registered.
     from app.models import Base
 
-    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    engine = create_engine(
+        "sqlite+pysqlite://",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    )
+
+    # pysqlite's implicit transaction handling breaks SAVEPOINT; let SQLAlchemy emit BEGIN itself.
+    @event.listens_for(engine, "connect")
+    def _disable_pysqlite_begin(dbapi_connection, connection_record):  # noqa: ANN001
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _emit_begin(connection):  # noqa: ANN001
+        connection.exec_driver_sql("BEGIN")
+
     Base.metadata.create_all(engine)
-    TestingSession = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    try:
+        yield engine
+    finally:
+        engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def module_connection(engine):
+    """One connection per test module, inside a transaction rolled back once the module finishes."""
 
-    session = TestingSession()
+    connection = engine.connect()
+    transaction = connection.begin()
+    try:
+        yield connection
+    finally:
+        transaction.rollback()
+        connection.close()
+
+
+@pytest.fixture(scope="module")
+def module_session(module_connection):
+    """Session for module-scoped seed data; its commits land in SAVEPOINTs of the module transaction."""
+
+    session = Session(
+        bind=module_connection,
+        autoflush=False,
+        expire_on_commit=False,
+        join_transaction_mode="create_savepoint",
+    )
     try:
         yield session
     finally:
-        session.rollback()
         session.close()
-        Base.metadata.drop_all(engine)
-        engine.dispose()
+
+
+@pytest.fixture()
+def session(module_connection):
+    """Provide a session whose commits land in a per-test SAVEPOINT rolled back after the test."""
+
+    savepoint = module_connection.begin_nested()
+    session = Session(bind=module_connection, autoflush=False, join_transaction_mode="create_savepoint")
+    try:
+        yield session
+    finally:
+        session.close()
+        if savepoint.is_active:
+            savepoint.rollback()
+
+
+@pytest.fixture(scope="module")
+def seeded_user(module_session):
+    """Owner account shared by every test in the module."""
+
+    from app.models.user import User, UserRole, UserStatus
+
+    user = User(
+        id=uuid.uuid4(),
+        name="Test User",
+        email="test@example.com",
+        password_hash="hashed-password",
+        role=UserRole.owner,
+        status=UserStatus.active,
+    )
+    module_session.add(user)
+    module_session.commit()
+    return user
+
+
+@pytest.fixture(scope="session")
+def paper_adapter():
+    from app.broker_adapters import get_adapter
+
+    return get_adapter("paper_trading")
+
+
+@pytest.fixture(scope="session")
+def paper_session_token(paper_adapter) -> str:
+    """One paper trading session for the run; the simulator keeps it valid process-wide."""
+
+    return paper_adapter.connect({"client_code": "paper-demo"}).token
+
+
+@pytest.fixture(scope="module")
+def seeded_paper_setup(module_session, seeded_user, paper_session_token):
+    """Connected paper broker, funded account and single-account execution group for ``seeded_user``."""
+
+    from app.models.account import Account
+    from app.models.broker import Broker, BrokerStatus
+    from app.models.execution_group import ExecutionGroup
+    from app.models.execution_group_account import ExecutionGroupAccount, LotAllocationPolicy
+
+    # Client-side ids let the whole graph go out in a single flush.
+    broker = Broker(
+        id=uuid.uuid4(),
+        user_id=seeded_user.id,
+        broker_name="paper_trading",
+        client_code="paper-demo",
+        session_token=paper_session_token,
+        status=BrokerStatus.connected,
+    )
+    account = Account(id=uuid.uuid4(), broker_id=broker.id, margin=1_000_000, currency="INR")
+    group = ExecutionGroup(id=uuid.uuid4(), user_id=seeded_user.id, name="Primary Group")
+    mapping = ExecutionGroupAccount(
+        id=uuid.uuid4(),
+        group_id=group.id,
+        account_id=account.id,
+        allocation_policy=LotAllocationPolicy.proportional,
+        weight=1.0,
+    )
+    module_session.add_all([broker, account, group, mapping])
+    module_session.commit()
+
+    return broker, account, group
+
+
+@pytest.fixture(scope="session")
+def client():
+    """One FastAPI TestClient (and app import) shared by every API test in the run."""
+
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture()
+def api_client(client, session):
+    """The shared TestClient with request-scoped DB sessions routed to this test's session."""
+
+    from app.db.session import get_db
+
+    client.app.dependency_overrides[get_db] = lambda: session
+    try:
+        yield client
+    finally:
+        client.app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.fixture()
+def count_queries(session):
+    """Return a context manager that records the SQL statements executed inside it."""
+
+    @contextmanager
+    def _count():
+        statements: list[str] = []
+
+        def _record(conn, cursor, statement, parameters, context, executemany):  # noqa: ANN001
+            # SAVEPOINT bookkeeping comes from the test session fixture, not the code under test.
+            if not _SAVEPOINT_STATEMENT.match(statement):
+                statements.append(statement)
+
+        bind = session.get_bind()
+        event.listen(bind, "before_cursor_execute", _record)
+        try:
+            yield statements
+        finally:
+            event.remove(bind, "before_cursor_execute", _record)
+
+    return _count
+
+
+class _DummyTOTP:
+    __slots__ = ("secret",)
+
+    def __init__(self, secret: str) -> None:
+        self.secret = secret
+
+    def now(self) -> str:
+        return "123456"
+
+
+class _AngelHTTPStub:
+    """Route table answering Angel API calls made through a MockTransport-backed client."""
+
+    def __init__(self) -> None:
+        self._routes: dict[str, Any] = {}
+        self.requests: list[httpx.Request] = []
+
+    def reset(self) -> None:
+        self._routes.clear()
+        self.requests.clear()
+
+    def route(self, path: str, payload: Any) -> None:
+        """Serve ``payload`` (or ``payload(request)`` when callable) as JSON for ``path``."""
+
+        self._routes[path] = payload
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        payload = self._routes.get(request.url.path)
+        if payload is None:
+            return httpx.Response(404, json={"status": False, "message": f"No stub for {request.url.path}"})
+        return httpx.Response(200, json=payload(request) if callable(payload) else payload)
+
+    @staticmethod
+    def body(request: httpx.Request) -> Any:
+        return json.loads(request.content) if request.content else None
+
+
+class _UncheckedResponse:
+    """Non-JSON response whose ``raise_for_status`` never raises, whatever the status code."""
+
+    __slots__ = ("status_code", "text")
+
+    def __init__(self, status_code: int, text: str) -> None:
+        self.status_code = status_code
+        self.text = text
+
+    def raise_for_status(self) -> None:
+        return None
+
+    def json(self) -> Any:
+        raise ValueError("not json")
+
+
+@functools.lru_cache(maxsize=32)
+def _unchecked_response(status_code: int, text: str) -> _UncheckedResponse:
+    return _UncheckedResponse(status_code, text)
+
+
+@pytest.fixture()
+def unchecked_response():
+    """Return a factory for cached responses that real ``httpx.Response`` objects cannot model."""
+
+    return _unchecked_response
+
+
+# One stub and one pooled client for the whole run; tests only swap the route table.
+_ANGEL_HTTP = _AngelHTTPStub()
+_ANGEL_CLIENT = httpx.Client(transport=httpx.MockTransport(_ANGEL_HTTP.handle))
+
+
+@pytest.fixture()
+def angel_http(monkeypatch):
+    """Point the Angel adapter at the shared MockTransport client and pin TOTP codes."""
+
+    _ANGEL_HTTP.reset()
+    monkeypatch.setattr("app.broker_adapters.angel._HTTP_CLIENT", _ANGEL_CLIENT)
+    monkeypatch.setattr("app.broker_adapters.angel.pyotp.TOTP", _DummyTOTP)
+    return _ANGEL_HTTP
+
+
+# Adapters are built once per run; tests get shallow copies re-pointed at whichever
+# instrument master (usually a per-test stub) is current.
+_SBIN_SYMBOL_CONFIG = {
+    "symbols": {
+        "SBIN": {
+            "tradingsymbol": "SBIN-EQ",
+            "symbol_token": "3045",
+            "exchange": "NSE",
+        }
+    }
+}
+
+
+def _fresh_angel_adapter(template):
+    from app.utils.angel_master import get_angel_instrument_master
+
+    adapter = copy.copy(template)
+    adapter._instrument_master = get_angel_instrument_master()
+    return adapter
+
+
+@pytest.fixture(scope="session")
+def _angel_adapter_blank():
+    from app.broker_adapters.angel import AngelAdapter
+
+    return AngelAdapter()
+
+
+@pytest.fixture(scope="session")
+def _angel_adapter_sbin():
+    from app.broker_adapters.angel import AngelAdapter
+
+    return AngelAdapter(config=_SBIN_SYMBOL_CONFIG)
+
+
+@pytest.fixture()
+def angel_adapter(_angel_adapter_blank):
+    """Angel adapter with the default configuration."""
+
+    return _fresh_angel_adapter(_angel_adapter_blank)
+
+
+@pytest.fixture()
+def angel_adapter_sbin(_angel_adapter_sbin):
+    """Angel adapter whose symbol map resolves SBIN to SBIN-EQ / 3045 on NSE."""
+
+    return _fresh_angel_adapter(_angel_adapter_sbin)
+
+
+# Session tokens are a pure function of the adapter's prefix and the claims, so identical
+# claim sets share one encoding across the whole run.
+_SESSION_TOKENS: dict[tuple, str] = {}
+
+
+@pytest.fixture()
+def make_session_token():
+    """Return a helper that encodes Angel session claims for ``adapter``."""
+
+    def _make(adapter, **claims) -> str:
+        key = (adapter._session_prefix, tuple(claims.items()))
+        token = _SESSION_TOKENS.get(key)
+        if token is None:
+            token = _SESSION_TOKENS[key] = adapter._encode_session(claims)
+        return token
+
+    return _make
@@ -1,12 +1,19 @@
 from __future__ import annotations
 
 import json
+import os
+import time
 from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
 
+import httpx
 import pytest
 
 from app.broker_adapters.angel import AngelAdapter
 from app.broker_adapters.base import BrokerAuthenticationError, BrokerOrderError, BrokerError, OrderPayload
+from app.utils.angel_master import AngelInstrumentMaster
+from tests.angel_endpoints import CONVERT, HOLDINGS, LOGIN, LOGOUT, PLACE_ORDER, POSITIONS, PROFILE, REFRESH
 
 @pytest.fixture()
 def angel_master_stub(monkeypatch: pytest.MonkeyPatch):
@@ -37,36 +44,10 @@ pytestmark = pytest.mark.usefixtures("angel_master_stub")
 
 
 
-class DummyResponse:
-    def __init__(self, payload: dict, status_code: int = 200) -> None:
-        self._payload = payload
-        self.status_code = status_code
-        self.text = json.dumps(payload)
-
-    def raise_for_status(self) -> None:  # noqa: D401 - simple stub
-        if self.status_code >= 400:
-            raise RuntimeError(f"HTTP {self.status_code}")
-
-    def json(self) -> dict:
-        return self._payload
-
-
-class DummyTOTP:
-    def __init__(self, secret: str) -> None:
-        self.secret = secret
-
-    def now(self) -> str:
-        return "123456"
-
-
-def test_connect_encodes_session(monkeypatch: pytest.MonkeyPatch) -> None:
-    calls: list[tuple[str, str]] = []
-
-    def fake_request(method: str, url: str, **kwargs):
-        calls.append((method, url))
-        assert kwargs["headers"]["X-PrivateKey"] == "key"
-        assert kwargs["json"]["clientcode"] == "CLIENT"
-        payload = {
+def test_connect_encodes_session(angel_http, angel_adapter) -> None:
+    angel_http.route(
+        LOGIN,
+        {
             "status": True,
             "data": {
                 "jwtToken": "jwt-token",
@@ -74,14 +55,10 @@ def test_connect_encodes_session(monkeypatch: pytest.MonkeyPatch) -> None:
                 "feedToken": "feed-token",
                 "expiresIn": 3600,
             },
-        }
-        return DummyResponse(payload)
-
-    monkeypatch.setattr("app.broker_adapters.angel.httpx.request", fake_request)
-    monkeypatch.setattr("app.broker_adapters.angel.pyotp.TOTP", lambda secret: DummyTOTP(secret))
+        },
+    )
 
-    adapter = AngelAdapter()
-    session = adapter.connect(
+    session = angel_adapter.connect(
         {
             "client_code": "CLIENT",
             "password": "pass",
@@ -90,51 +67,37 @@ def test_connect_encodes_session(monkeypatch: pytest.MonkeyPatch) -> None:
         }
     )
 
-    assert calls == [("POST", "https://apiconnect.angelone.in/rest/auth/angelbroking/user/v1/loginByPassword")]
+    calls = [(request.method, str(request.url)) for request in angel_http.requests]
+    assert calls == [("POST", f"https://apiconnect.angelone.in{LOGIN}")]
+    assert angel_http.requests[0].headers["X-PrivateKey"] == "key"
+    assert angel_http.body(angel_http.requests[0])["clientcode"] == "CLIENT"
     assert session.expires_at is not None
     assert session.expires_at > datetime.now(timezone.utc)
 
-    payload = adapter._decode_session(session.token)
+    payload = angel_adapter._decode_session(session.token)
     assert payload["jwt"] == "jwt-token"
     assert payload["api_key"] == "key"
     assert payload["client_code"] == "CLIENT"
 
 
-def test_place_order_uses_symbol_map(monkeypatch: pytest.MonkeyPatch) -> None:
-    recorded_json: dict | None = None
-
-    def fake_request(method: str, url: str, **kwargs):
-        nonlocal recorded_json
-        if url.endswith("/rest/auth/angelbroking/user/v1/loginByPassword"):
-            payload = {
-                "status": True,
-                "data": {
-                    "jwtToken": "jwt-token",
-                    "refreshToken": "refresh-token",
-                    "feedToken": "feed-token",
-                },
-            }
-        else:
-            recorded_json = kwargs.get("json")
-            payload = {"status": True, "data": {"orderid": "12345", "status": "SUCCESS"}}
-        return DummyResponse(payload)
-
-    monkeypatch.setattr("app.broker_adapters.angel.httpx.request", fake_request)
-    monkeypatch.setattr("app.broker_adapters.angel.pyotp.TOTP", lambda secret: DummyTOTP(secret))
-
-    adapter = AngelAdapter(
-        config={
-            "symbols": {
-                "SBIN": {
-                    "tradingsymbol": "SBIN-EQ",
-                    "symbol_token": "3045",
-                    "exchange": "NSE",
-                }
-            }
-        }
+def test_place_order_uses_symbol_map(angel_http, angel_adapter_sbin) -> None:
+    angel_http.route(
+        LOGIN,
+        {
+            "status": True,
+            "data": {
+                "jwtToken": "jwt-token",
+                "refreshToken": "refresh-token",
+                "feedToken": "feed-token",
+            },
+        },
+    )
+    angel_http.route(
+        PLACE_ORDER,
+        {"status": True, "data": {"orderid": "12345", "status": "SUCCESS"}},
     )
 
-    session = adapter.connect(
+    session = angel_adapter_sbin.connect(
         {
             "client_code": "CLIENT",
             "password": "pass",
@@ -150,10 +113,10 @@ def test_place_order_uses_symbol_map(monkeypatch: pytest.MonkeyPatch) -> None:
         order_type="LIMIT",
         price=780.5,
     )
-    result = adapter.place_order(session.token, order_payload)
+    result = angel_adapter_sbin.place_order(session.token, order_payload)
 
     assert result.order_id == "12345"
-    assert recorded_json is not None
+    recorded_json = angel_http.body(angel_http.requests[-1])
     assert recorded_json["tradingsymbol"] == "SBIN-EQ"
     assert recorded_json["symboltoken"] == "3045"
     assert recorded_json["quantity"] == "10"
@@ -161,94 +124,108 @@ def test_place_order_uses_symbol_map(monkeypatch: pytest.MonkeyPatch) -> None:
     assert recorded_json["price"] == "780.50"
 
 
-def test_resolve_instrument_requires_mapping() -> None:
-    adapter = AngelAdapter()
-    session_token = adapter._encode_session(
-        {
-            "jwt": "jwt",
-            "api_key": "key",
-        }
-    )
+def test_resolve_instrument_requires_mapping(make_session_token, angel_adapter) -> None:
+    session_token = make_session_token(angel_adapter, jwt="jwt", api_key="key")
 
     with pytest.raises(BrokerOrderError):
-        adapter.place_order(
+        angel_adapter.place_order(
             session_token,
             OrderPayload(symbol="UNKNOWN", side="BUY", quantity=1, order_type="MARKET"),
         )
 
 
-def test_invalid_session_token() -> None:
-    adapter = AngelAdapter()
+def test_invalid_session_token(angel_adapter) -> None:
     with pytest.raises(BrokerAuthenticationError):
-        adapter.place_order(
+        angel_adapter.place_order(
             "invalid-token",
             OrderPayload(symbol="SBIN::3045::NSE", side="BUY", quantity=1, order_type="MARKET"),
         )
 
-def test_call_api_non_json(monkeypatch):
-    def fake_request(method, url, **kwargs):
-        class Resp:
-            status_code = 500
-            text = "Server maintenance"
-
-            def raise_for_status(self):
-                return None
-
-            def json(self):
-                raise ValueError("not json")
-
-        return Resp()
-
-    monkeypatch.setattr("app.broker_adapters.angel.httpx.request", fake_request)
+def test_call_api_non_json(monkeypatch, angel_adapter, unchecked_response):
+    monkeypatch.setattr(
+        "app.broker_adapters.angel._HTTP_CLIENT.request",
+        lambda method, url, **kwargs: unchecked_response(500, "Server maintenance"),
+    )
 
-    adapter = AngelAdapter()
     with pytest.raises(BrokerError) as exc_info:
-        adapter._call_api("GET", "/test", api_key="k", client_code=None, jwt_token=None)
+        angel_adapter._call_api("GET", "/test", api_key="k", client_code=None, jwt_token=None)
     assert "Server maintenance" in str(exc_info.value)
 
 
 
-def test_refresh_session_renews_tokens(monkeypatch: pytest.MonkeyPatch) -> None:
-    captured: dict[str, object] = {}
-
-    def fake_request(method: str, url: str, **kwargs):
-        captured["method"] = method
-        captured["url"] = url
-        captured["headers"] = kwargs.get("headers")
-        captured["json"] = kwargs.get("json")
-        payload = {
-            "status": True,
-            "data": {
-                "jwtToken": "jwt-new",
-                "refreshToken": "refresh-new",
-                "feedToken": "feed-new",
-                "expiresIn": 90,
-            },
-        }
-        return DummyResponse(payload)
-
-    monkeypatch.setattr("app.broker_adapters.angel.httpx.request", fake_request)
-
-    adapter = AngelAdapter()
-    session_token = adapter._encode_session(
-        {
-            "jwt": "jwt-old",
-            "refresh": "refresh-old",
-            "feed": "feed-old",
-            "api_key": "key",
-            "client_code": "CLIENT",
-            "expires_at": None,
-        }
-    )
+def test_refresh_session_requires_refresh_token(make_session_token, angel_adapter) -> None:
+    session_token = make_session_token(angel_adapter, jwt="jwt-old", api_key="key")
+    with pytest.raises(BrokerAuthenticationError):
+        angel_adapter.refresh_session(session_token)
 
-    session = adapter.refresh_session(session_token)
 
-    assert captured["method"] == "POST"
-    assert str(captured["url"]).endswith("/rest/auth/angelbroking/jwt/v1/generateTokens")
-    assert captured["json"] == {"refreshToken": "refresh-old"}
-    headers = captured.get("headers")
-    assert isinstance(headers, dict)
-    assert headers["Authorization"] == "Bearer jwt-old"
+def test_logout_requires_client_code(make_session_token, angel_adapter) -> None:
+    session_token = make_session_token(angel_adapter, jwt="jwt", api_key="key")
+    with pytest.raises(BrokerAuthenticationError):
+        angel_adapter.logout(session_token)
+
+
+_SAMPLE_POSITION = {
+    "exchange": "NSE",
+    "tradingsymbol": "RELIANCE-EQ",
+    "symboltoken": "2885",
+    "producttype": "DELIVERY",
+    "symbolname": "RELIANCE",
+    "buyqty": "1",
+    "sellqty": "0",
+    "buyamount": "2235.80",
+    "sellamount": "0",
+    "buyavgprice": "2235.80",
+    "sellavgprice": "0",
+    "avgnetprice": "2235.80",
+    "netvalue": "- 2235.80",
+    "netqty": "1",
+    "totalbuyvalue": "2235.80",
+    "totalsellvalue": "0",
+    "netprice": "2235.80",
+    "lotsize": "1",
+}
+
+_SAMPLE_HOLDING = {
+    "tradingsymbol": "TATASTEEL-EQ",
+    "exchange": "nse",
+    "isin": "INE081A01020",
+    "t1quantity": "0",
+    "realisedquantity": "2",
+    "quantity": "2",
+    "authorisedquantity": "0",
+    "product": "delivery",
+    "averageprice": "111.87",
+    "ltp": "130.15",
+    "symboltoken": "3499",
+    "close": "129.6",
+    "profitandloss": "37",
+    "pnlpercentage": "16.34",
+}
+
+_SAMPLE_HOLDING_SUMMARY = {
+    "totalholdingvalue": "5294",
+    "totalinvvalue": "5116",
+    "totalprofitandloss": "178.14",
+    "totalpnlpercentage": "3.48",
+}
+
+_CONVERT_PAYLOAD = {
+    "exchange": "NSE",
+    "symboltoken": "2885",
+    "tradingsymbol": "RELIANCE-EQ",
+    "oldproducttype": "DELIVERY",
+    "newproducttype": "INTRADAY",
+    "transactiontype": "BUY",
+    "quantity": 1,
+}
+
+_SESSION_CLAIMS = {"jwt": "jwt", "api_key": "key", "client_code": "CLIENT"}
+
+
+def _check_refresh(adapter: AngelAdapter, session, request, body) -> None:
+    assert body == {"refreshToken": "refresh-old"}
+    assert request.headers["Authorization"] == "Bearer jwt-old"
 
     payload = adapter._decode_session(session.token)
     assert payload["jwt"] == "jwt-new"
@@ -258,151 +235,26 @@ def test_refresh_session_renews_tokens(monkeypatch: pytest.MonkeyPatch) -> None:
     assert session.expires_at is not None
 
 
-def test_refresh_session_requires_refresh_token() -> None:
-    adapter = AngelAdapter()
-    session_token = adapter._encode_session({"jwt": "jwt-old", "api_key": "key"})
-    with pytest.raises(BrokerAuthenticationError):
-        adapter.refresh_session(session_token)
-
-def test_get_profile_returns_payload(monkeypatch: pytest.MonkeyPatch) -> None:
-    captured = {}
-
-    def fake_request(method: str, url: str, **kwargs):
-        captured["method"] = method
-        captured["url"] = url
-        captured["headers"] = kwargs.get("headers")
-        return DummyResponse({"status": True, "data": {"clientcode": "CLIENT", "name": "User"}})
-
-    monkeypatch.setattr("app.broker_adapters.angel.httpx.request", fake_request)
-
-    adapter = AngelAdapter()
-    session_token = adapter._encode_session({"jwt": "jwt", "api_key": "key", "client_code": "CLIENT"})
-
-    profile = adapter.get_profile(session_token)
-
+def _check_profile(adapter: AngelAdapter, profile, request, body) -> None:
     assert profile == {"clientcode": "CLIENT", "name": "User"}
-    assert captured["method"] == "GET"
-    assert str(captured["url"]).endswith("/rest/secure/angelbroking/user/v1/getProfile")
-    headers = captured.get("headers")
-    assert isinstance(headers, dict)
-    assert headers["Authorization"] == "Bearer jwt"
-
+    assert request.headers["Authorization"] == "Bearer jwt"
 
-def test_logout_clears_remote_session(monkeypatch: pytest.MonkeyPatch) -> None:
-    captured = {}
-
-    def fake_request(method: str, url: str, **kwargs):
-        captured["method"] = method
-        captured["url"] = url
-        captured["json"] = kwargs.get("json")
-        captured["headers"] = kwargs.get("headers")
-        return DummyResponse({"status": True, "data": ""})
-
-    monkeypatch.setattr("app.broker_adapters.angel.httpx.request", fake_request)
-
-    adapter = AngelAdapter()
-    session_token = adapter._encode_session({"jwt": "jwt", "api_key": "key", "client_code": "CLIENT"})
-
-    result = adapter.logout(session_token)
 
+def _check_logout(adapter: AngelAdapter, result, request, body) -> None:
     assert result is True
-    assert captured["method"] == "POST"
-    assert str(captured["url"]).endswith("/rest/secure/angelbroking/user/v1/logout")
-    assert captured["json"] == {"clientcode": "CLIENT"}
-    headers = captured.get("headers")
-    assert isinstance(headers, dict)
-    assert headers["Authorization"] == "Bearer jwt"
-
+    assert body == {"clientcode": "CLIENT"}
+    assert request.headers["Authorization"] == "Bearer jwt"
 
-def test_logout_requires_client_code() -> None:
-    adapter = AngelAdapter()
-    session_token = adapter._encode_session({"jwt": "jwt", "api_key": "key"})
-    with pytest.raises(BrokerAuthenticationError):
-        adapter.logout(session_token)
-
-def test_get_positions_normalizes_payload(monkeypatch: pytest.MonkeyPatch) -> None:
-    captured: dict[str, object] = {}
-
-    sample_position = {
-        "exchange": "NSE",
-        "tradingsymbol": "RELIANCE-EQ",
-        "symboltoken": "2885",
-        "producttype": "DELIVERY",
-        "symbolname": "RELIANCE",
-        "buyqty": "1",
-        "sellqty": "0",
-        "buyamount": "2235.80",
-        "sellamount": "0",
-        "buyavgprice": "2235.80",
-        "sellavgprice": "0",
-        "avgnetprice": "2235.80",
-        "netvalue": "- 2235.80",
-        "netqty": "1",
-        "totalbuyvalue": "2235.80",
-        "totalsellvalue": "0",
-        "netprice": "2235.80",
-        "lotsize": "1",
-    }
-
-    def fake_request(method: str, url: str, **kwargs):
-        captured["method"] = method
-        captured["url"] = url
-        return DummyResponse({"status": True, "data": {"net": [sample_position], "day": []}})
-
-    monkeypatch.setattr("app.broker_adapters.angel.httpx.request", fake_request)
-
-    adapter = AngelAdapter()
-    session_token = adapter._encode_session({"jwt": "jwt", "api_key": "key", "client_code": "CLIENT"})
-
-    positions = adapter.get_positions(session_token)
 
+def _check_positions(adapter: AngelAdapter, positions, request, body) -> None:
     assert positions["net"]
     entry = positions["net"][0]
     assert entry["buy_qty"] == 1
     assert entry["net_value"] == -2235.8
     assert entry["product_type"] == "DELIVERY"
-    assert captured["method"] == "GET"
-    assert str(captured["url"]).endswith("/rest/secure/angelbroking/order/v1/getPosition")
-
-
-def test_get_holdings_normalizes_payload(monkeypatch: pytest.MonkeyPatch) -> None:
-    captured: dict[str, object] = {}
-
-    sample_holding = {
-        "tradingsymbol": "TATASTEEL-EQ",
-        "exchange": "nse",
-        "isin": "INE081A01020",
-        "t1quantity": "0",
-        "realisedquantity": "2",
-        "quantity": "2",
-        "authorisedquantity": "0",
-        "product": "delivery",
-        "averageprice": "111.87",
-        "ltp": "130.15",
-        "symboltoken": "3499",
-        "close": "129.6",
-        "profitandloss": "37",
-        "pnlpercentage": "16.34",
-    }
-    sample_summary = {
-        "totalholdingvalue": "5294",
-        "totalinvvalue": "5116",
-        "totalprofitandloss": "178.14",
-        "totalpnlpercentage": "3.48",
-    }
-
-    def fake_request(method: str, url: str, **kwargs):
-        captured["method"] = method
-        captured["url"] = url
-        return DummyResponse({"status": True, "data": {"holdings": [sample_holding], "totalholding": sample_summary}})
-
-    monkeypatch.setattr("app.broker_adapters.angel.httpx.request", fake_request)
-
-    adapter = AngelAdapter()
-    session_token = adapter._encode_session({"jwt": "jwt", "api_key": "key", "client_code": "CLIENT"})
-
-    holdings = adapter.get_holdings(session_token)
 
+
+def _check_holdings(adapter: AngelAdapter, holdings, request, body) -> None:
     assert holdings["holdings"]
     entry = holdings["holdings"][0]
     assert entry["exchange"] == "NSE"
@@ -411,46 +263,213 @@ def test_get_holdings_normalizes_payload(monkeypatch: pytest.MonkeyPatch) -> Non
     summary = holdings["summary"]
     assert summary is not None
     assert summary["total_profit_and_loss"] == 178.14
-    assert str(captured["url"]).endswith("/rest/secure/angelbroking/portfolio/v1/getAllHolding")
 
 
-def test_convert_position_posts_payload(monkeypatch: pytest.MonkeyPatch) -> None:
-    captured: dict[str, object] = {}
+def _check_convert(adapter: AngelAdapter, response, request, body) -> None:
+    assert response["status"] is True
+    assert body["newproducttype"] == "INTRADAY"
+
+
+@pytest.mark.parametrize(
+    ("method_name", "args", "claims", "http_method", "path", "response", "check"),
+    [
+        pytest.param(
+            "refresh_session",
+            (),
+            {
+                "jwt": "jwt-old",
+                "refresh": "refresh-old",
+                "feed": "feed-old",
+                "api_key": "key",
+                "client_code": "CLIENT",
+                "expires_at": None,
+            },
+            "POST",
+            REFRESH,
+            {
+                "status": True,
+                "data": {
+                    "jwtToken": "jwt-new",
+                    "refreshToken": "refresh-new",
+                    "feedToken": "feed-new",
+                    "expiresIn": 90,
+                },
+            },
+            _check_refresh,
+            id="refresh_session",
+        ),
+        pytest.param(
+            "get_profile",
+            (),
+            _SESSION_CLAIMS,
+            "GET",
+            PROFILE,
+            {"status": True, "data": {"clientcode": "CLIENT", "name": "User"}},
+            _check_profile,
+            id="get_profile",
+        ),
+        pytest.param(
+            "logout",
+            (),
+            _SESSION_CLAIMS,
+            "POST",
+            LOGOUT,
+            {"status": True, "data": ""},
+            _check_logout,
+            id="logout",
+        ),
+        pytest.param(
+            "get_positions",
+            (),
+            _SESSION_CLAIMS,
+            "GET",
+            POSITIONS,
+            {"status": True, "data": {"net": [_SAMPLE_POSITION], "day": []}},
+            _check_positions,
+            id="get_positions",
+        ),
+        pytest.param(
+            "get_holdings",
+            (),
+            _SESSION_CLAIMS,
+            "GET",
+            HOLDINGS,
+            {"status": True, "data": {"holdings": [_SAMPLE_HOLDING], "totalholding": _SAMPLE_HOLDING_SUMMARY}},
+            _check_holdings,
+            id="get_holdings",
+        ),
+        pytest.param(
+            "convert_position",
+            (_CONVERT_PAYLOAD,),
+            _SESSION_CLAIMS,
+            "POST",
+            CONVERT,
+            {"status": True, "message": "SUCCESS", "data": None},
+            _check_convert,
+            id="convert_position",
+        ),
+    ],
+)
+def test_adapter_endpoint(
+    angel_http, make_session_token, angel_adapter, method_name, args, claims, http_method, path, response, check
+) -> None:
+    angel_http.route(path, response)
+    session_token = make_session_token(angel_adapter, **claims)
+
+    result = getattr(angel_adapter, method_name)(session_token, *args)
+
+    assert len(angel_http.requests) == 1
+    request = angel_http.requests[0]
+    assert request.method == http_method
+    assert request.url.path == path
+    check(angel_adapter, result, request, angel_http.body(request))
+
+
+def test_resolve_instrument_uses_master(monkeypatch: pytest.MonkeyPatch, angel_master_stub, angel_adapter):
+    angel_master_stub.add("SBIN-EQ", "3045", "NSE")
 
-    def fake_request(method: str, url: str, **kwargs):
-        captured["method"] = method
-        captured["url"] = url
-        captured["json"] = kwargs.get("json")
-        return DummyResponse({"status": True, "message": "SUCCESS", "data": None})
+    instrument = angel_adapter._resolve_instrument("SBIN-EQ")
 
-    monkeypatch.setattr("app.broker_adapters.angel.httpx.request", fake_request)
+    assert instrument["symbol_token"] == "3045"
+    assert instrument["tradingsymbol"] == "SBIN-EQ"
 
-    adapter = AngelAdapter()
-    session_token = adapter._encode_session({"jwt": "jwt", "api_key": "key", "client_code": "CLIENT"})
 
-    payload = {
-        "exchange": "NSE",
-        "symboltoken": "2885",
-        "tradingsymbol": "RELIANCE-EQ",
-        "oldproducttype": "DELIVERY",
-        "newproducttype": "INTRADAY",
-        "transactiontype": "BUY",
-        "quantity": 1,
-    }
+def _write_master(tmp_path: Path, records: Any) -> Path:
+    cache_path = tmp_path / "master.json"
+    cache_path.write_text(json.dumps(records))
+    return cache_path
 
-    response = adapter.convert_position(session_token, payload)
 
-    assert response["status"] is True
-    assert captured["method"] == "POST"
-    assert str(captured["url"]).endswith("/rest/secure/angelbroking/order/v1/convertPosition")
-    assert captured["json"]["newproducttype"] == "INTRADAY"
+def test_instrument_master_indexes_cached_file(tmp_path) -> None:
+    cache_path = _write_master(
+        tmp_path,
+        [
+            {"symbol": "SBIN-EQ", "token": "3045", "exch_seg": "nse", "instrumenttype": ""},
+            {"tradingsymbol": "NIFTY", "symboltoken": 26000, "exch_seg": "NSE", "instrumenttype": "AMXIDX"},
+            {"tradingsymbol": "MISSING-TOKEN", "exch_seg": "NSE"},
+            "not-a-record",
+        ],
+    )
+    master = AngelInstrumentMaster(cache_path=cache_path, auto_refresh=False)
 
+    assert master.lookup("sbin", exchange="NSE")["symbol_token"] == "3045"
+    assert master.lookup("SBIN-EQ", exchange="BSE")["exchange"] == "NSE"
+    assert master.lookup("NIFTY")["instrument_type"] == "AMXIDX"
+    assert master.lookup("MISSING-TOKEN") is None
 
-def test_resolve_instrument_uses_master(monkeypatch: pytest.MonkeyPatch, angel_master_stub):
-    angel_master_stub.add("SBIN-EQ", "3045", "NSE")
 
-    adapter = AngelAdapter()
-    instrument = adapter._resolve_instrument("SBIN-EQ")
+@pytest.mark.parametrize("streaming", [True, False], ids=["ijson", "full-parse"])
+def test_instrument_master_rejects_non_array_master(monkeypatch: pytest.MonkeyPatch, tmp_path, streaming: bool) -> None:
+    if not streaming:
+        monkeypatch.setattr("app.utils.angel_master.ijson", None)
+    cache_path = _write_master(tmp_path, {"data": [{"tradingsymbol": "SBIN-EQ", "symboltoken": "3045"}]})
+    master = AngelInstrumentMaster(cache_path=cache_path, auto_refresh=False)
 
-    assert instrument["symbol_token"] == "3045"
-    assert instrument["tradingsymbol"] == "SBIN-EQ"
+    with pytest.raises(RuntimeError, match="malformed"):
+        master.lookup("SBIN")
+
+
+def test_instrument_master_auto_refresh_uses_fresh_cache_without_deadlock(tmp_path) -> None:
+    cache_path = _write_master(tmp_path, [{"tradingsymbol": "SBIN-EQ", "symboltoken": "3045", "exch_seg": "NSE"}])
+    master = AngelInstrumentMaster(cache_path=cache_path, auto_refresh=True)
+
+    assert master.lookup("SBIN")["symbol_token"] == "3045"
+    # Second lookup takes the lock-free path against the already-built index.
+    assert master.lookup("SBIN-EQ", exchange="NSE")["symbol_token"] == "3045"
+
+
+def test_instrument_master_resolves_aliases_from_index(tmp_path) -> None:
+    cache_path = _write_master(
+        tmp_path,
+        [
+            {"tradingsymbol": "SBIN-EQ", "symboltoken": "3045", "exch_seg": "NSE"},
+            {"tradingsymbol": "NIFTY", "symboltoken": "26000", "exch_seg": "NSE"},
+        ],
+    )
+    master = AngelInstrumentMaster(cache_path=cache_path, auto_refresh=False)
+
+    assert master.lookup("SBIN", exchange="BSE")["symbol_token"] == "3045"
+    assert master.lookup("NIFTY-EQ")["symbol_token"] == "26000"
+    assert master.lookup("SBIN-BE", exchange="NSE")["symbol_token"] == "3045"
+    assert master.lookup("TCS", exchange="NSE") is None
+
+
+def test_instrument_master_prefers_exact_symbol_over_earlier_alias(tmp_path) -> None:
+    cache_path = _write_master(
+        tmp_path,
+        [
+            {"tradingsymbol": "SBIN-EQ", "symboltoken": "3045", "exch_seg": "NSE"},
+            {"tradingsymbol": "SBIN", "symboltoken": "500112", "exch_seg": "BSE"},
+            {"tradingsymbol": "TCS", "symboltoken": "11536", "exch_seg": "BSE"},
+            {"tradingsymbol": "TCS-EQ", "symboltoken": "11537", "exch_seg": "NSE"},
+        ],
+    )
+    master = AngelInstrumentMaster(cache_path=cache_path, auto_refresh=False)
+
+    assert master.lookup("SBIN")["symbol_token"] == "500112"
+    assert master.lookup("SBIN", exchange="MCX")["symbol_token"] == "500112"
+    assert master.lookup("SBIN", exchange="NSE")["symbol_token"] == "3045"
+    assert master.lookup("TCS-EQ", exchange="MCX")["symbol_token"] == "11537"
+
+
+def test_instrument_master_keeps_index_when_master_not_modified(monkeypatch: pytest.MonkeyPatch, tmp_path) -> None:
+    cache_path = _write_master(tmp_path, [{"tradingsymbol": "SBIN-EQ", "symboltoken": "3045", "exch_seg": "NSE"}])
+    stale = time.time() - 2 * 24 * 3600
+    os.utime(cache_path, (stale, stale))
+    master = AngelInstrumentMaster(cache_path=cache_path, auto_refresh=False)
+    assert master.lookup("SBIN")["symbol_token"] == "3045"
+    index = master._index
+
+    requests: list[dict[str, str]] = []
+
+    def fake_get(url, *, headers, timeout):
+        requests.append(headers)
+        return httpx.Response(304, request=httpx.Request("GET", url))
+
+    monkeypatch.setattr("app.utils.angel_master.httpx.get", fake_get)
+    master.ensure_cache()
+
+    assert "If-Modified-Since" in requests[0]
+    assert cache_path.stat().st_mtime > stale
+    assert master._index is index
+    assert master._loaded_mtime == cache_path.stat().st_mtime
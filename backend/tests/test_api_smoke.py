@@ -0,0 +1,108 @@
+"""API smoke flows formerly run as ``scripts/smoke_test.py`` and ``scripts/phase1_*.py``."""
+
+from __future__ import annotations
+
+import os
+
+import httpx
+import pytest
+
+from app.models.user import User
+
+# Point the smoke flows at a running deployment instead of the in-process app.
+_SMOKE_BASE_URL = os.environ.get("SMOKE_BASE_URL")
+
+
+@pytest.fixture()
+def owner(session):
+    user = User(name="Smoke Owner", email="smoke.owner@example.com", password_hash="hashed")
+    session.add(user)
+    session.commit()
+    return user
+
+
+@pytest.fixture(scope="module")
+def remote_client():
+    """Keep-alive client reused for every request the module sends to ``SMOKE_BASE_URL``."""
+
+    with httpx.Client(
+        base_url=_SMOKE_BASE_URL,
+        limits=httpx.Limits(max_keepalive_connections=16),
+        timeout=10.0,
+    ) as client:
+        yield client
+
+
+@pytest.fixture()
+def smoke_client(request):
+    """Remote client when ``SMOKE_BASE_URL`` is set, otherwise the in-process app with a seeded owner."""
+
+    if _SMOKE_BASE_URL:
+        return request.getfixturevalue("remote_client")
+    request.getfixturevalue("owner")
+    return request.getfixturevalue("api_client")
+
+
+@pytest.mark.parametrize("path", ["/health", "/api/auth/health", "/api/rms/status", "/api/analytics/dashboard"])
+def test_status_endpoints_respond(smoke_client, path: str) -> None:
+    assert smoke_client.get(path).status_code == 200
+
+
+def test_phase1_broker_connect_and_paper_order(smoke_client) -> None:
+    supported = smoke_client.get("/api/brokers/supported")
+    assert supported.status_code == 200
+
+    connect = smoke_client.post(
+        "/api/brokers/connect",
+        json={
+            "broker_name": "paper_trading",
+            "client_code": "demo",
+            "credentials": {"client_code": "demo"},
+        },
+    )
+    assert connect.status_code == 201
+    broker_id = connect.json()["id"]
+
+    order = smoke_client.post(
+        "/api/orders",
+        json={
+            "broker_id": broker_id,
+            "symbol": "NIFTY24SEP24000CE",
+            "side": "BUY",
+            "qty": 1,
+            "order_type": "MARKET",
+        },
+    )
+    assert order.status_code in (200, 201)
+
+    orders = smoke_client.get("/api/orders")
+    assert orders.status_code == 200
+    assert orders.json()
+    assert smoke_client.get("/api/rms/status").status_code == 200
+
+
+def test_phase1_strategy_lifecycle(api_client, owner, monkeypatch: pytest.MonkeyPatch) -> None:
+    enqueued: list[dict] = []
+    monkeypatch.setattr(
+        "app.tasks.strategy.trigger_strategy_run.delay",
+        lambda *args, **kwargs: enqueued.append(kwargs),
+    )
+
+    created = api_client.post(
+        "/api/strategies",
+        json={"name": "Opening Range Breakout", "type": "built-in", "params": {"window": 15, "symbol": "NIFTY"}},
+    )
+    assert created.status_code == 201
+    strategy_id = created.json()["id"]
+
+    started = api_client.post(
+        f"/api/strategies/{strategy_id}/start",
+        json={"mode": "paper", "configuration": {"note": "phase1 smoke"}},
+    )
+    assert started.status_code == 200
+    assert len(enqueued) == 1
+
+    assert api_client.get(f"/api/strategies/{strategy_id}/logs").status_code == 200
+    stopped = api_client.post(f"/api/strategies/{strategy_id}/stop", json={"reason": "demo complete"})
+    assert stopped.status_code == 200
+    assert api_client.get(f"/api/strategies/{strategy_id}/pnl").status_code == 200
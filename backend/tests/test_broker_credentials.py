@@ -7,7 +7,7 @@ from app.models.broker import Broker, BrokerStatus
 from app.models.user import User
 from app.schemas.broker import BrokerConnectRequest, BrokerStatusEnum
 from app.services.brokers import BrokerService
-from app.utils.crypto import decrypt_credentials
+from app.utils.crypto import CredentialDecryptError, _get_cipher, decrypt_credentials, encrypt_credentials
 
 
 @pytest.fixture()
@@ -78,3 +78,14 @@ def test_login_without_credentials_fails(session, user):
         service.login(user.id, broker.id)
 
 
+def test_decrypt_credentials_reads_aes_gcm_and_legacy_fernet_tokens():
+    token = encrypt_credentials({"api_key": "secret"})
+    assert token.startswith("v2.")
+    assert decrypt_credentials(token) == {"api_key": "secret"}
+
+    legacy = _get_cipher().encrypt(b'{"api_key":"legacy"}').decode("utf-8")
+    assert decrypt_credentials(legacy) == {"api_key": "legacy"}
+
+    tampered = token[:20] + ("A" if token[20] != "A" else "B") + token[21:]
+    with pytest.raises(CredentialDecryptError):
+        decrypt_credentials(tampered)
@@ -11,6 +11,32 @@ from app.schemas.portfolio import (
 from app.services.brokers import BrokerService
 
 
+# Shared read-only payloads: BrokerService only validates them, never mutates them.
+# Kept as plain dicts because the service rejects non-dict payloads.
+_POSITIONS_PAYLOAD = {
+    "net": [
+        {
+            "tradingsymbol": "ABC",
+            "exchange": "NSE",
+            "symboltoken": "1",
+        }
+    ],
+    "day": [],
+}
+
+_HOLDINGS_PAYLOAD = {
+    "holdings": [
+        {
+            "tradingsymbol": "ABC",
+            "exchange": "NSE",
+            "quantity": "1",
+            "symboltoken": "1",
+        }
+    ],
+    "summary": {"totalholdingvalue": "100"},
+}
+
+
 class DummyPortfolioAdapter:
     def __init__(self) -> None:
         self.calls: list[str] = []
@@ -18,30 +44,11 @@ class DummyPortfolioAdapter:
 
     def get_positions(self, token: str) -> dict:
         self.calls.append(f"positions:{token}")
-        return {
-            "net": [
-                {
-                    "tradingsymbol": "ABC",
-                    "exchange": "NSE",
-                    "symboltoken": "1",
-                }
-            ],
-            "day": [],
-        }
+        return _POSITIONS_PAYLOAD
 
     def get_holdings(self, token: str) -> dict:
         self.calls.append(f"holdings:{token}")
-        return {
-            "holdings": [
-                {
-                    "tradingsymbol": "ABC",
-                    "exchange": "NSE",
-                    "quantity": "1",
-                    "symboltoken": "1",
-                }
-            ],
-            "summary": {"totalholdingvalue": "100"},
-        }
+        return _HOLDINGS_PAYLOAD
 
     def convert_position(self, token: str, payload: dict) -> dict:
         self.calls.append(f"convert:{token}")
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import date, datetime, timedelta, timezone
 from uuid import uuid4
 
 import pytest
@@ -10,6 +10,7 @@ from app.models import (
     Account,
     Broker,
     BrokerStatus,
+    DailyUserAggregate,
     LogEntry,
     Order,
     OrderSide,
@@ -20,38 +21,39 @@ from app.models import (
     Trade,
     User,
 )
-from app.services.rms import RmsService
+from app.schemas.order import OrderCreate, OrderSideEnum
+from app.services.rms import RmsService, RmsViolationError
 from app.utils.dt import utcnow
 
 
-@pytest.fixture()
-def user(session):
+@pytest.fixture(scope="module")
+def user(module_session):
     test_user = User(
         id=uuid4(),
         name="RMS Tester",
         email="rms.tester@example.com",
         password_hash="hashed",
     )
-    session.add(test_user)
-    session.commit()
+    module_session.add(test_user)
+    module_session.commit()
     return test_user
 
 
-def _seed_core_entities(session, user):
+@pytest.fixture(scope="module")
+def seeded_account(module_session, user):
+    """Broker, account, losing filled order, its trade and an open position, seeded once per module."""
+
+    # Ids are assigned up front so the whole graph goes out in a single flush and commit.
     broker = Broker(
+        id=uuid4(),
         user_id=user.id,
         broker_name="MockBroker",
         client_code="ABC123",
         status=BrokerStatus.connected,
     )
-    session.add(broker)
-    session.flush()
-
-    account = Account(broker_id=broker.id, margin=100_000)
-    session.add(account)
-    session.flush()
-
+    account = Account(id=uuid4(), broker_id=broker.id, margin=100_000)
     order = Order(
+        id=uuid4(),
         account_id=account.id,
         symbol="NIFTY24SEP",
         side=OrderSide.buy,
@@ -60,9 +62,6 @@ def _seed_core_entities(session, user):
         order_type=OrderType.market,
         status=OrderStatus.filled,
     )
-    session.add(order)
-    session.flush()
-
     trade = Trade(
         order_id=order.id,
         fill_price=995,
@@ -70,8 +69,6 @@ def _seed_core_entities(session, user):
         pnl=-940,
         timestamp=utcnow(),
     )
-    session.add(trade)
-
     position = Position(
         account_id=account.id,
         symbol="NIFTY24SEP",
@@ -80,14 +77,12 @@ def _seed_core_entities(session, user):
         pnl=-20,
         updated_at=utcnow(),
     )
-    session.add(position)
-
-    session.commit()
+    module_session.add_all([broker, account, order, trade, position])
+    module_session.commit()
     return account
 
 
-def test_rms_status_reports_automation_cues(session, user):
-    account = _seed_core_entities(session, user)
+def test_rms_status_reports_automation_cues(session, user, seeded_account):
 
     rule = RmsRule(
         user_id=user.id,
@@ -103,15 +98,14 @@ def test_rms_status_reports_automation_cues(session, user):
     session.commit()
 
     service = RmsService(session)
-    status = service.get_status(user.id)
+    status = service.get_status(user.id, detailed=True)
 
     assert status.automations, "Expected automation cues to be surfaced in RMS status"
     assert any("Auto square-off" in entry for entry in status.automations)
     assert any("Auto hedge" in entry for entry in status.automations)
 
 
-def test_auto_enforce_triggers_actions_and_notifications(session, user):
-    account = _seed_core_entities(session, user)
+def test_auto_enforce_triggers_actions_and_notifications(session, user, seeded_account):
 
     rule = RmsRule(
         user_id=user.id,
@@ -140,3 +134,187 @@ def test_auto_enforce_triggers_actions_and_notifications(session, user):
     assert any("Auto hedge queued" in message for message in messages)
     assert any("Notification queued via email" in message for message in messages)
     assert any("Notification queued via telegram" in message for message in messages)
+
+
+def test_pre_trade_skips_snapshot_when_only_order_size_is_limited(session, user, monkeypatch):
+    session.add(RmsRule(user_id=user.id, max_lots=10))
+    session.commit()
+
+    service = RmsService(session)
+
+    def _fail_snapshot(user_id):
+        raise AssertionError("daily snapshot should not be computed")
+
+    monkeypatch.setattr(service, "_daily_snapshot", _fail_snapshot)
+    payload = OrderCreate(broker_id=uuid4(), symbol="NIFTY24SEP", side=OrderSideEnum.BUY, qty=5)
+    service.evaluate_pre_trade(user.id, payload)
+
+    with pytest.raises(RmsViolationError) as exc_info:
+        service.evaluate_pre_trade(user.id, payload.model_copy(update={"qty": 11}))
+    assert exc_info.value.code == "RMS_MAX_ORDER_SIZE"
+
+
+def test_automated_square_off_is_not_queued_twice(session, user, seeded_account):
+    service = RmsService(session)
+
+    first = service.trigger_square_off(user.id, automated=True)
+    second = service.trigger_square_off(user.id, automated=True)
+
+    assert first.triggered and first.positions
+    assert not second.triggered
+    logs = session.execute(select(LogEntry).where(LogEntry.user_id == user.id)).scalars().all()
+    assert sum(log.message.startswith("Automated RMS square-off") for log in logs) == 1
+
+
+def test_repeated_auto_enforce_does_not_renotify_a_queued_square_off(session, user, seeded_account):
+    session.add(
+        RmsRule(
+            user_id=user.id,
+            max_daily_loss=1000,
+            auto_square_off_enabled=True,
+            auto_square_off_buffer_pct=5,
+            notify_email=True,
+        )
+    )
+    session.commit()
+    service = RmsService(session)
+
+    first = service.auto_enforce(user.id)
+    second = service.auto_enforce(user.id)
+
+    assert [action.endswith("(1 positions queued)") for action in first] == [True]
+    assert [action.endswith("(skipped: already queued)") for action in second] == [True]
+    logs = session.execute(select(LogEntry).where(LogEntry.user_id == user.id)).scalars().all()
+    assert sum(log.message.startswith("Notification queued via email") for log in logs) == 1
+
+
+def test_auto_enforce_notifies_even_when_the_reason_reads_like_a_duplicate(session, user, seeded_account, monkeypatch):
+    # Deduplication is reported out of band, so the cue wording cannot suppress a notification.
+    monkeypatch.setattr("app.services.rms._SQUARE_OFF_LOSS_MESSAGE", "Automated RMS square-off already queued")
+    session.add(
+        RmsRule(
+            user_id=user.id,
+            max_daily_loss=1000,
+            auto_square_off_enabled=True,
+            auto_square_off_buffer_pct=5,
+            notify_email=True,
+        )
+    )
+    session.commit()
+
+    actions = RmsService(session).auto_enforce(user.id)
+
+    assert [action.endswith("(1 positions queued)") for action in actions] == [True]
+    logs = session.execute(select(LogEntry).where(LogEntry.user_id == user.id)).scalars().all()
+    assert sum(log.message.startswith("Notification queued via email") for log in logs) == 1
+
+
+def test_only_automated_square_off_takes_the_rule_row_lock(session, user, seeded_account, monkeypatch):
+    service = RmsService(session)
+    locked: list = []
+    monkeypatch.setattr(service, "_lock_rule_row", locked.append)
+
+    manual = service.trigger_square_off(user.id)
+    assert manual.triggered and manual.positions
+    assert locked == []
+
+    automated = service.trigger_square_off(user.id, automated=True)
+    assert automated.triggered and automated.positions
+    assert locked == [user.id]
+
+
+def test_rule_cache_evicts_least_recently_used_users(session, user, monkeypatch):
+    monkeypatch.setattr("app.services.rms._RULE_CACHE_SIZE", 1)
+    other = User(id=uuid4(), name="Other Tester", email="rms.other@example.com", password_hash="hashed")
+    session.add(other)
+    session.commit()
+    service = RmsService(session)
+
+    service.get_config(user.id)
+    service.get_config(other.id)
+
+    assert list(service._rules) == [other.id]
+
+
+def test_get_config_converts_rule_fields(session, user):
+    session.add(RmsRule(user_id=user.id, max_daily_loss=1500, max_lots=4, auto_hedge_enabled=True))
+    session.commit()
+
+    config = RmsService(session).get_config(user.id)
+
+    assert config.max_daily_loss == 1500.0
+    assert isinstance(config.max_daily_loss, float)
+    assert config.max_lots == 4
+    assert config.auto_hedge_enabled is True
+    assert config.exposure_limit is None
+    assert config.updated_at is not None
+
+
+def test_get_status_query_budget(session, user, seeded_account, count_queries):
+    session.add(RmsRule(user_id=user.id, max_daily_loss=1000, auto_square_off_enabled=True))
+    session.commit()
+    user_id = user.id
+    session.expunge_all()
+
+    with count_queries() as statements:
+        RmsService(session).get_status(user_id, detailed=True)
+
+    # Rule lookup, daily aggregate row, positions and margin.
+    assert len(statements) <= 4
+
+
+def test_daily_aggregate_tracks_order_lots_and_trade_pnl(session, user, seeded_account):
+
+    aggregate = session.get(DailyUserAggregate, (user.id, utcnow().date()))
+
+    assert aggregate is not None
+    assert aggregate.lots == 50
+    assert float(aggregate.realised_pnl) == -940.0
+
+
+def test_daily_aggregate_buckets_aware_timestamps_by_utc_day(session, user, seeded_account):
+    order_id = session.execute(select(Order.id).where(Order.account_id == seeded_account.id)).scalar_one()
+    # 01:00 on 2 Jan in IST is still 1 Jan in UTC.
+    ist = timezone(timedelta(hours=5, minutes=30))
+    session.add(Trade(order_id=order_id, fill_price=990, qty=10, pnl=75, timestamp=datetime(2025, 1, 2, 1, 0, tzinfo=ist)))
+    session.commit()
+
+    assert session.get(DailyUserAggregate, (user.id, date(2025, 1, 2))) is None
+    assert float(session.get(DailyUserAggregate, (user.id, date(2025, 1, 1))).realised_pnl) == 75.0
+
+
+def test_daily_aggregate_falls_back_to_update_then_insert(session, user, seeded_account, monkeypatch):
+    # Dialects without an ON CONFLICT insert take the portable path.
+    monkeypatch.setattr("app.db.upsert._DIALECT_INSERTS", {})
+    order = Order(
+        id=uuid4(),
+        account_id=seeded_account.id,
+        symbol="NIFTY24SEP",
+        side=OrderSide.sell,
+        qty=25,
+        price=1000,
+        order_type=OrderType.market,
+        status=OrderStatus.filled,
+        created_at=datetime(2025, 1, 1, 9, 30),
+    )
+    # The order inserts the day's row and its trade updates it.
+    trade = Trade(order_id=order.id, fill_price=1010, qty=25, pnl=250, timestamp=datetime(2025, 1, 1, 10, 0))
+    session.add_all([order, trade])
+    session.commit()
+
+    aggregate = session.get(DailyUserAggregate, (user.id, date(2025, 1, 1)))
+
+    assert aggregate.lots == 25
+    assert float(aggregate.realised_pnl) == 250.0
+
+
+def test_vectorized_snapshot_matches_python_path(session, user, seeded_account, monkeypatch):
+    pytest.importorskip("numpy")
+    service = RmsService(session)
+
+    expected = service._daily_snapshot(user.id)
+    monkeypatch.setattr("app.services.rms._VECTORIZE_MIN_POSITIONS", 1)
+    vectorized = service._daily_snapshot(user.id)
+
+    assert vectorized.notional_exposure == pytest.approx(expected.notional_exposure)
+    assert vectorized.day_pnl == pytest.approx(expected.day_pnl)
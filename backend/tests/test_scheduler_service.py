@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import pytest
+from kombu.exceptions import OperationalError
+
+from app.models.scheduler_job import SchedulerJob
+from app.schemas.scheduler import ScheduledJobCreate
+from app.services import scheduler as scheduler_module
+from app.services.scheduler import StrategySchedulerService
+
+
+def _create_job(session, user) -> SchedulerJob:
+    return StrategySchedulerService(session).create_job(
+        user.id, ScheduledJobCreate(name="Nightly rebalance", cron_expression="@daily")
+    )
+
+
+def test_stage_trigger_leaves_the_publish_to_the_caller(session, seeded_user, monkeypatch):
+    published: list[dict] = []
+    monkeypatch.setattr(scheduler_module.trigger_strategy_run, "delay", lambda **kwargs: published.append(kwargs))
+    job = _create_job(session, seeded_user)
+
+    staged, pending = StrategySchedulerService(session).stage_trigger(seeded_user.id, job.id)
+
+    assert staged.last_triggered_at is not None
+    assert published == []
+    pending.publish(session)
+    assert published == [{"user_id": str(seeded_user.id), "strategy_id": None, "context": {}}]
+
+
+def test_failed_publish_restores_the_previous_trigger_stamp(session, seeded_user, monkeypatch):
+    def _broker_down(**kwargs):
+        raise OperationalError("broker unreachable")
+
+    monkeypatch.setattr(scheduler_module.trigger_strategy_run, "delay", _broker_down)
+    job = _create_job(session, seeded_user)
+
+    _, pending = StrategySchedulerService(session).stage_trigger(seeded_user.id, job.id)
+    with pytest.raises(OperationalError):
+        pending.publish(session)
+
+    session.expire_all()
+    assert session.get(SchedulerJob, job.id).last_triggered_at is None
+
+
+def test_background_publish_failure_is_logged_not_raised(session, seeded_user, monkeypatch):
+    def _broker_down(**kwargs):
+        raise OperationalError("broker unreachable")
+
+    logged: list[str] = []
+    monkeypatch.setattr(scheduler_module.trigger_strategy_run, "delay", _broker_down)
+    monkeypatch.setattr(scheduler_module.logger, "exception", lambda message, *args: logged.append(message))
+    job = _create_job(session, seeded_user)
+
+    _, pending = StrategySchedulerService(session).stage_trigger(seeded_user.id, job.id)
+    pending.publish(session, reraise=False)
+
+    assert len(logged) == 1
+    session.expire_all()
+    assert session.get(SchedulerJob, job.id).last_triggered_at is None
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        "* * * * *",
+        "*/5 0 1 1 0",
+        "0-59/15 9-15 1,15 JAN-MAR MON-FRI",
+        "5/10 1,2,3 * DEC SUN",
+        "0 9 * jan mon-fri",
+        "@daily",
+        "@once",
+    ],
+)
+def test_validate_cron_accepts_supported_fields(expression):
+    StrategySchedulerService._validate_cron(expression)
+
+
+@pytest.mark.parametrize(
+    "token",
+    [
+        ",", "-", "/", "5-/,", "1,", ",1", "1-", "*/", "*/MON", "1#2,3", "L", "?", "MONDAY", "1--5", "**",
+        # Only real month/day names, and only ASCII digits.
+        "FOO", "xyz", "jan-foo", "\u0661",
+    ],
+)
+def test_validate_cron_rejects_malformed_fields(token):
+    with pytest.raises(ValueError, match="Unsupported cron token"):
+        StrategySchedulerService._validate_cron(f"0 {token} * * *")
+
+
+def test_validate_cron_rejects_wrong_field_count_and_unknown_shortcuts():
+    with pytest.raises(ValueError, match="5 fields"):
+        StrategySchedulerService._validate_cron("* * * *")
+    with pytest.raises(ValueError, match="Unsupported cron shortcut"):
+        StrategySchedulerService._validate_cron("@yearly")
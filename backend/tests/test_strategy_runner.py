@@ -4,69 +4,22 @@ import uuid
 from datetime import datetime
 
 import pytest
+from sqlalchemy import insert
 
-from app.broker_adapters import get_adapter
-from app.models.account import Account
-from app.models.broker import Broker, BrokerStatus
-from app.models.execution_group import ExecutionGroup
-from app.models.execution_group_account import ExecutionGroupAccount, LotAllocationPolicy
+from app.core.ids import uuid7
 from app.models.execution_run import ExecutionRun
 from app.models.strategy import Strategy, StrategyStatus, StrategyType
+from app.models.strategy_log import StrategyLog, StrategyLogLevel
 from app.models.strategy_run import StrategyMode, StrategyRun, StrategyRunStatus
-from app.models.user import User, UserRole, UserStatus
-from app.schemas.strategy import StrategyModeEnum
+from app.models.user import User
+from app.schemas.strategy import StrategyLogLevelEnum, StrategyModeEnum
+from app.services.strategies import StrategyService
 from app.services.strategy_runner import StrategyRunner
 
 
-def _create_user(session) -> User:
-    user = User(
-        name="Test User",
-        email="test@example.com",
-        password_hash="hashed-password",
-        role=UserRole.owner,
-        status=UserStatus.active,
-    )
-    session.add(user)
-    session.flush()
-    return user
-
-
-def _create_paper_broker_setup(session, user: User) -> tuple[Broker, Account, ExecutionGroup]:
-    paper_adapter = get_adapter("paper_trading")
-    session_token = paper_adapter.connect({"client_code": "paper-demo"}).token
-
-    broker = Broker(
-        user_id=user.id,
-        broker_name="paper_trading",
-        client_code="paper-demo",
-        session_token=session_token,
-        status=BrokerStatus.connected,
-    )
-    session.add(broker)
-    session.flush()
-
-    account = Account(broker_id=broker.id, margin=1_000_000, currency="INR")
-    session.add(account)
-    session.flush()
-
-    group = ExecutionGroup(user_id=user.id, name="Primary Group")
-    session.add(group)
-    session.flush()
-
-    mapping = ExecutionGroupAccount(
-        group_id=group.id,
-        account_id=account.id,
-        allocation_policy=LotAllocationPolicy.proportional,
-        weight=1.0,
-    )
-    session.add(mapping)
-    session.flush()
-
-    return broker, account, group
-
-
 def _create_strategy(session, user: User, params: dict) -> Strategy:
     strategy = Strategy(
+        id=uuid.uuid4(),
         user_id=user.id,
         name="Strategy Alpha",
         type=StrategyType.built_in,
@@ -74,26 +27,38 @@ def _create_strategy(session, user: User, params: dict) -> Strategy:
         params=params,
     )
     session.add(strategy)
-    session.flush()
     return strategy
 
 
 def _create_run(session, strategy: Strategy, mode: StrategyMode, parameters: dict) -> StrategyRun:
     run = StrategyRun(
+        id=uuid7(),
         strategy_id=strategy.id,
         mode=mode,
         status=StrategyRunStatus.running,
         parameters=parameters,
-        started_at=datetime.utcnow(),
     )
     session.add(run)
-    session.flush()
     return run
 
 
-def test_strategy_runner_paper_execution_creates_execution_run(session):
-    user = _create_user(session)
-    _, account, group = _create_paper_broker_setup(session, user)
+def _bulk_create_runs(session, strategy: Strategy, mode: StrategyMode, count: int) -> list[uuid.UUID]:
+    # Core executemany skips per-instance unit-of-work bookkeeping; flush the strategy it references first.
+    session.flush()
+    run_ids = [uuid7() for _ in range(count)]
+    session.execute(
+        insert(StrategyRun),
+        [
+            {"id": run_id, "strategy_id": strategy.id, "mode": mode, "status": StrategyRunStatus.running}
+            for run_id in run_ids
+        ],
+    )
+    return run_ids
+
+
+def test_strategy_runner_paper_execution_creates_execution_run(session, seeded_user, seeded_paper_setup):
+    user = seeded_user
+    _, account, group = seeded_paper_setup
 
     configuration = {
         "symbol": "NIFTY23SEP",
@@ -106,7 +71,7 @@ def test_strategy_runner_paper_execution_creates_execution_run(session):
 
     strategy = _create_strategy(session, user, params=configuration)
     run = _create_run(session, strategy, StrategyMode.paper, configuration)
-    session.commit()
+    session.flush()
 
     runner = StrategyRunner(session)
     result = runner.run(
@@ -135,8 +100,8 @@ def test_strategy_runner_paper_execution_creates_execution_run(session):
     assert sum(leg_status_counts.values()) >= 1
 
 
-def test_strategy_runner_backtest_simulation_computes_metrics(session):
-    user = _create_user(session)
+def test_strategy_runner_backtest_simulation_computes_metrics(session, seeded_user):
+    user = seeded_user
     base_configuration = {
         "symbol": "BANKNIFTY",
         "side": "SELL",
@@ -148,7 +113,7 @@ def test_strategy_runner_backtest_simulation_computes_metrics(session):
 
     strategy = _create_strategy(session, user, params=base_configuration)
     run = _create_run(session, strategy, StrategyMode.backtest, base_configuration)
-    session.commit()
+    session.flush()
 
     runner = StrategyRunner(session)
     result = runner.run(
@@ -164,3 +129,76 @@ def test_strategy_runner_backtest_simulation_computes_metrics(session):
     assert result.metrics["orders"] == 1
     assert result.metrics["trades"] == 1
     assert result.logs, "Expected backtest to emit log entries"
+
+
+def test_append_log_batch_persists_runner_logs_in_one_insert(session, count_queries, seeded_user):
+    user = seeded_user
+    strategy = _create_strategy(session, user, params={})
+    run = _create_run(session, strategy, StrategyMode.backtest, {})
+    session.flush()
+
+    items = [
+        (StrategyLogLevelEnum.info, "started", {"step": 1}),
+        (StrategyLogLevelEnum.warning, "slippage", None),
+        ("unknown", "falls back to info", {}),
+    ]
+    service = StrategyService(session)
+    with count_queries() as queries:
+        written = service.append_log_batch(strategy_id=strategy.id, run_id=run.id, items=items)
+
+    assert written == 3
+    assert sum(1 for statement in queries if statement.lstrip().upper().startswith("INSERT")) == 1
+    logs = session.query(StrategyLog).filter_by(run_id=run.id).order_by(StrategyLog.message).all()
+    assert [log.level for log in logs] == [StrategyLogLevel.info, StrategyLogLevel.warning, StrategyLogLevel.info]
+    assert service.append_log_batch(strategy_id=strategy.id, run_id=run.id, items=[]) == 0
+
+
+def test_get_logs_returns_a_batch_newest_first(session, seeded_user):
+    user = seeded_user
+    strategy = _create_strategy(session, user, params={})
+    run = _create_run(session, strategy, StrategyMode.backtest, {})
+    session.flush()
+
+    service = StrategyService(session)
+    items = [(StrategyLogLevelEnum.info, f"m{index}", None) for index in range(5)]
+    service.append_log_batch(strategy_id=strategy.id, run_id=run.id, items=items, commit=False)
+
+    # The whole batch shares one database timestamp; the time-ordered ids break the tie.
+    logs = service.get_logs(user.id, strategy.id, include_context=False).logs
+    assert [log.message for log in logs] == ["m4", "m3", "m2", "m1", "m0"]
+
+
+@pytest.mark.parametrize("upsert", [True, False], ids=["on-conflict", "update-then-insert"])
+def test_record_run_metrics_keeps_performance_summary_in_step(session, seeded_user, monkeypatch, upsert):
+    if not upsert:
+        # Dialects without an ON CONFLICT insert take the portable path.
+        monkeypatch.setattr("app.db.upsert._DIALECT_INSERTS", {})
+    user = seeded_user
+    strategy = _create_strategy(session, user, params={})
+    first_id, second_id = _bulk_create_runs(session, strategy, StrategyMode.paper, 2)
+
+    service = StrategyService(session)
+    service.record_run_metrics(strategy.id, first_id, {"pnl": 120.0, "trades": 2})
+    service.record_run_metrics(strategy.id, first_id, {"pnl": 150.0, "trades": 3})
+    service.record_run_metrics(strategy.id, second_id, {"pnl": -50.0, "trades": 1, "status": "completed"})
+
+    performance = service.get_performance(user.id, strategy.id)
+    assert performance.lifetime_pnl == pytest.approx(100.0)
+    assert performance.total_trades == 4
+
+
+def test_record_run_metrics_stamps_finished_at_outside_json_metrics(session, seeded_user):
+    user = seeded_user
+    strategy = _create_strategy(session, user, params={})
+    run = _create_run(session, strategy, StrategyMode.backtest, {})
+    session.flush()
+
+    run_read = StrategyService(session).record_run_metrics(
+        strategy.id, run.id, {"status": "completed", "pnl": 10.0, "trades": 1, "finished_at": datetime.utcnow()}
+    )
+
+    assert run_read.finished_at is not None
+    session.expire_all()
+    stored = session.get(StrategyRun, run.id)
+    assert stored.finished_at is not None
+    assert "finished_at" not in stored.result_metrics
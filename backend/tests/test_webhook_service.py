@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import hmac
+import uuid
+
+import pytest
+import redis
+from fastapi import BackgroundTasks
+
+from app.schemas.webhook import WebhookConnectorCreate, WebhookEventIn
+from app.services import webhook as webhook_module
+from app.services.webhook import WebhookService
+
+
+class _FakePipeline:
+    def __init__(self, client: "_FakeRedis") -> None:
+        self._client = client
+        self._calls: list[tuple[str, tuple]] = []
+
+    def hset(self, *args) -> None:
+        self._calls.append(("hset", args))
+
+    def expire(self, *args) -> None:
+        self._calls.append(("expire", args))
+
+    def execute(self) -> list:
+        return [getattr(self._client, name)(*args) for name, args in self._calls]
+
+
+class _FakeRedis:
+    """The handful of hash commands WebhookService uses, answering with bytes like redis-py."""
+
+    def __init__(self) -> None:
+        self.hashes: dict[str, dict[bytes, bytes]] = {}
+        self.expiries: dict[str, int] = {}
+
+    def pipeline(self) -> _FakePipeline:
+        return _FakePipeline(self)
+
+    def hset(self, key: str, field: str, value: str) -> int:
+        self.hashes.setdefault(key, {})[field.encode()] = value.encode()
+        return 1
+
+    def hget(self, key: str, field: str) -> bytes | None:
+        return self.hashes.get(key, {}).get(field.encode())
+
+    def hgetall(self, key: str) -> dict[bytes, bytes]:
+        return dict(self.hashes.get(key, {}))
+
+    def hdel(self, key: str, field: str) -> int:
+        return 1 if self.hashes.get(key, {}).pop(field.encode(), None) is not None else 0
+
+    def expire(self, key: str, seconds: int) -> bool:
+        self.expiries[key] = seconds
+        return True
+
+
+_CONNECTOR = WebhookConnectorCreate(
+    name="TradingView alerts",
+    provider="tradingview",
+    target_url="https://example.com/hooks/tv",
+)
+
+
+@pytest.fixture()
+def fake_redis() -> _FakeRedis:
+    return _FakeRedis()
+
+
+@pytest.fixture(params=["memory", "redis"])
+def service(request, fake_redis) -> WebhookService:
+    return WebhookService(fake_redis if request.param == "redis" else None)
+
+
+def test_connector_create_list_delete_round_trip(service: WebhookService) -> None:
+    owner, other = uuid.uuid4(), uuid.uuid4()
+    connector = service.create_connector(owner, _CONNECTOR)
+
+    assert [item.id for item in service.list_connectors(owner)] == [connector.id]
+    assert service.list_connectors(other) == []
+    assert service.delete_connector(other, connector.id) is False
+    assert service.delete_connector(owner, connector.id) is True
+    assert service.list_connectors(owner) == []
+    assert service.delete_connector(owner, connector.id) is False
+
+
+def test_dispatch_event_schedules_handler_for_known_connector(service: WebhookService) -> None:
+    connector = service.create_connector(uuid.uuid4(), _CONNECTOR)
+    background_tasks = BackgroundTasks()
+
+    service.dispatch_event(
+        connector.id,
+        WebhookEventIn(connector_id=connector.id, payload={"signal": "BUY"}),
+        background_tasks,
+    )
+
+    assert len(background_tasks.tasks) == 1
+    with pytest.raises(KeyError):
+        service.dispatch_event(
+            uuid.uuid4(),
+            WebhookEventIn(connector_id=connector.id, payload={}),
+            BackgroundTasks(),
+        )
+
+
+def test_redis_store_is_shared_between_service_instances(fake_redis: _FakeRedis) -> None:
+    owner = uuid.uuid4()
+    connector = WebhookService(fake_redis, ttl_seconds=60).create_connector(owner, _CONNECTOR)
+
+    other_worker = WebhookService(fake_redis)
+    assert [item.id for item in other_worker.list_connectors(owner)] == [connector.id]
+    assert other_worker._get_connector(connector.id) == connector
+    assert fake_redis.expiries == {f"webhook:connectors:{owner}": 60}
+
+
+def test_get_connector_drops_stale_owner_pointer(fake_redis: _FakeRedis) -> None:
+    owner = uuid.uuid4()
+    connector = WebhookService(fake_redis).create_connector(owner, _CONNECTOR)
+    # The per-user hash expired while the owner pointer survived.
+    del fake_redis.hashes[f"webhook:connectors:{owner}"]
+
+    assert WebhookService(fake_redis)._get_connector(connector.id) is None
+    assert fake_redis.hget("webhook:connector-owners", str(connector.id)) is None
+
+
+def test_memory_store_is_an_explicit_setting(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(webhook_module.settings, "webhook_connector_store", "memory")
+
+    assert webhook_module._connector_store_client() is None
+
+
+def test_unreachable_redis_fails_the_request_instead_of_falling_back(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(webhook_module.settings, "webhook_connector_store", "redis")
+    monkeypatch.setattr(webhook_module.settings, "redis_url", "redis://127.0.0.1:1/0")
+    monkeypatch.setattr(webhook_module, "_service", None)
+
+    # Building the service does not touch Redis; the first command does, and raises.
+    service = webhook_module.get_webhook_service()
+    assert service._redis is not None
+    assert webhook_module.get_webhook_service() is service
+    with pytest.raises(redis.ConnectionError):
+        service.list_connectors(uuid.uuid4())
+
+
+def test_signature_covers_canonical_stdlib_json() -> None:
+    service = WebhookService()
+    connector = service.create_connector(uuid.uuid4(), _CONNECTOR.model_copy(update={"secret": "s3cret"}))
+    payload = {"symbol": "NIFTY", "qty": 2, "price": 1e-7, "note": "café"}
+    signed = b'{"note":"caf\xc3\xa9","price":1e-07,"qty":2,"symbol":"NIFTY"}'
+    signature = hmac.new(b"s3cret", signed, "sha256").hexdigest()
+
+    assert service._validate_event(connector, WebhookEventIn(connector_id=connector.id, payload=payload, signature=signature))
+    assert not service._validate_event(
+        connector,
+        WebhookEventIn(connector_id=connector.id, payload={**payload, "qty": 3}, signature=signature),
+    )
+
+
+def test_unserialisable_payload_is_rejected_not_raised() -> None:
+    service = WebhookService()
+    connector = service.create_connector(uuid.uuid4(), _CONNECTOR)
+    event = WebhookEventIn(connector_id=connector.id, payload={"bad": "\ud800"})
+
+    with pytest.raises(PermissionError):
+        service.dispatch_event(connector.id, event, BackgroundTasks())
+
+
+def test_secretless_connector_accepts_unsigned_event() -> None:
+    service = WebhookService()
+    connector = service.create_connector(uuid.uuid4(), _CONNECTOR)
+
+    assert service._validate_event(connector, WebhookEventIn(connector_id=connector.id, payload={"signal": "BUY"}))
+
+
+@pytest.mark.parametrize(
+    "signature, headers",
+    [
+        (None, None),
+        ("not-a-valid-digest", None),
+        ("signé-ü", None),
+        (None, {"X-Webhook-Signature": "☃"}),
+    ],
+)
+def test_secured_connector_rejects_missing_or_bad_signature(signature, headers) -> None:
+    service = WebhookService()
+    connector = service.create_connector(uuid.uuid4(), _CONNECTOR.model_copy(update={"secret": "s3cret"}))
+    event = WebhookEventIn(connector_id=connector.id, payload={"signal": "BUY"}, signature=signature, headers=headers)
+
+    assert service._validate_event(connector, event) is False
+    with pytest.raises(PermissionError):
+        service.dispatch_event(connector.id, event, BackgroundTasks())
@@ -13,11 +13,26 @@ if str(BACKEND_DIR) not in sys.path:
 
 from app.core.config import settings  # noqa: E402
 from app.db.base import Base  # noqa: E402
-from app.models import *  # noqa: F401,F403
 
 config = context.config
 config.set_main_option("sqlalchemy.url", settings.database_url)
 
+# Only commands that diff the schema against the models need every model module imported;
+# upgrade/downgrade/history/current run the revision scripts alone.
+_METADATA_COMMANDS = {"revision", "check"}
+
+
+def _needs_model_metadata() -> bool:
+    cmd = getattr(config.cmd_opts, "cmd", None)
+    if not cmd:
+        # Programmatic use (alembic.command.*) gives no hint; register the models to be safe.
+        return True
+    return cmd[0].__name__ in _METADATA_COMMANDS
+
+
+if _needs_model_metadata():
+    import app.models  # noqa: E402,F401  Registers every table on Base.metadata.
+
 target_metadata = Base.metadata
 
 def run_migrations_offline() -> None:
@@ -33,7 +48,22 @@ def run_migrations_offline() -> None:
         context.run_migrations()
 
 
+def _run_with_connection(connection) -> None:
+    context.configure(connection=connection, target_metadata=target_metadata)
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
 def run_migrations_online() -> None:
+    # Callers running several commands in one process (test fixtures, scripts) can hand in a
+    # pooled connection via ``config.attributes["connection"]`` instead of paying a fresh
+    # engine and backend startup for every invocation.
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _run_with_connection(connection)
+        return
+
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
@@ -41,10 +71,7 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
-
-        with context.begin_transaction():
-            context.run_migrations()
+        _run_with_connection(connection)
 
 
 if context.is_offline_mode():
@@ -0,0 +1,35 @@
+"""unique rms rule per user
+
+Revision ID: 7a3e91c4d2b8
+Revises: 0db4ec5f1ad2, f4a9d2539771
+Create Date: 2025-09-24 09:12:30
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "7a3e91c4d2b8"
+down_revision = ("0db4ec5f1ad2", "f4a9d2539771")
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Keep only the most recently updated rule for users that accumulated duplicates.
+    op.execute(
+        sa.text(
+            "DELETE FROM rms_rules WHERE id IN ("
+            " SELECT id FROM ("
+            "  SELECT id, ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY updated_at DESC) AS rn"
+            "  FROM rms_rules"
+            " ) ranked WHERE ranked.rn > 1"
+            ")"
+        )
+    )
+    op.create_index(op.f("ix_rms_rules_user_id"), "rms_rules", ["user_id"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_rms_rules_user_id"), table_name="rms_rules")
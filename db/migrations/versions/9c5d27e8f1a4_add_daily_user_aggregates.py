@@ -0,0 +1,54 @@
+"""add daily user aggregates
+
+Revision ID: 9c5d27e8f1a4
+Revises: 7a3e91c4d2b8
+Create Date: 2025-09-24 15:40:12
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "9c5d27e8f1a4"
+down_revision = "7a3e91c4d2b8"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "daily_user_aggregates",
+        sa.Column("user_id", sa.UUID(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("lots", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("realised_pnl", sa.Numeric(precision=18, scale=2), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "day"),
+    )
+    # Backfill from existing orders and trades so the running totals start out correct. Days are
+    # UTC dates, matching the ORM listeners; DATE() on a timestamptz would follow the session TimeZone.
+    if op.get_bind().dialect.name == "postgresql":
+        order_day = "(o.created_at AT TIME ZONE 'UTC')::date"
+        trade_day = "(t.timestamp AT TIME ZONE 'UTC')::date"
+    else:
+        order_day = "DATE(o.created_at)"
+        trade_day = "DATE(t.timestamp)"
+    op.execute(
+        sa.text(
+            "INSERT INTO daily_user_aggregates (user_id, day, lots, realised_pnl, updated_at) "
+            "SELECT user_id, day, SUM(lots), SUM(pnl), CURRENT_TIMESTAMP FROM ("
+            f" SELECT b.user_id AS user_id, {order_day} AS day, o.qty AS lots, 0 AS pnl"
+            " FROM orders o JOIN accounts a ON a.id = o.account_id JOIN brokers b ON b.id = a.broker_id"
+            " UNION ALL"
+            f" SELECT b.user_id, {trade_day}, 0, COALESCE(t.pnl, 0)"
+            " FROM trades t JOIN orders o ON o.id = t.order_id"
+            " JOIN accounts a ON a.id = o.account_id JOIN brokers b ON b.id = a.broker_id"
+            ") combined GROUP BY user_id, day"
+        )
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("daily_user_aggregates")
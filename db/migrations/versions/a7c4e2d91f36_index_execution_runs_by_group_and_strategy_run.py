@@ -0,0 +1,36 @@
+"""index execution runs by group and strategy run
+
+Revision ID: a7c4e2d91f36
+Revises: f18c3b7d52e9
+Create Date: 2025-09-28 11:40:12
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "a7c4e2d91f36"
+down_revision = "f18c3b7d52e9"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_execution_runs_group_requested",
+        "execution_runs",
+        ["group_id", sa.text("requested_at DESC")],
+        unique=False,
+    )
+    op.create_index(
+        "ix_execution_runs_strategy_run_id",
+        "execution_runs",
+        ["strategy_run_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_execution_runs_strategy_run_id", table_name="execution_runs")
+    op.drop_index("ix_execution_runs_group_requested", table_name="execution_runs")
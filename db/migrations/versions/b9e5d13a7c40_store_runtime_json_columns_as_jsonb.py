@@ -0,0 +1,55 @@
+"""store runtime json columns as jsonb
+
+Revision ID: b9e5d13a7c40
+Revises: a7c4e2d91f36
+Create Date: 2025-09-29 10:18:05
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "b9e5d13a7c40"
+down_revision = "a7c4e2d91f36"
+branch_labels = None
+depends_on = None
+
+
+JSON_COLUMNS = (
+    ("strategy_runs", "parameters"),
+    ("strategy_runs", "result_metrics"),
+    ("strategy_logs", "context"),
+    ("execution_runs", "payload"),
+    ("scheduler_jobs", "context"),
+)
+
+
+def upgrade() -> None:
+    # Other backends have no jsonb; their JSON columns stay as they are.
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for table, column in JSON_COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=postgresql.JSONB(),
+            existing_type=sa.JSON(),
+            existing_nullable=True,
+            postgresql_using=f"{column}::jsonb",
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for table, column in reversed(JSON_COLUMNS):
+        op.alter_column(
+            table,
+            column,
+            type_=sa.JSON(),
+            existing_type=postgresql.JSONB(),
+            existing_nullable=True,
+            postgresql_using=f"{column}::json",
+        )
@@ -0,0 +1,36 @@
+"""index strategy runs and logs by time
+
+Revision ID: d3b8a6f04c21
+Revises: 9c5d27e8f1a4
+Create Date: 2025-09-25 10:05:44
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "d3b8a6f04c21"
+down_revision = "9c5d27e8f1a4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_strategy_runs_strategy_started",
+        "strategy_runs",
+        ["strategy_id", sa.text("started_at DESC")],
+        unique=False,
+    )
+    op.create_index(
+        "ix_strategy_logs_strategy_created",
+        "strategy_logs",
+        ["strategy_id", sa.text("created_at DESC")],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_strategy_logs_strategy_created", table_name="strategy_logs")
+    op.drop_index("ix_strategy_runs_strategy_started", table_name="strategy_runs")
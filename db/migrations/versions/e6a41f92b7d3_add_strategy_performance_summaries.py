@@ -0,0 +1,46 @@
+"""add strategy performance summaries
+
+Revision ID: e6a41f92b7d3
+Revises: d3b8a6f04c21
+Create Date: 2025-09-26 11:05:48
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e6a41f92b7d3"
+down_revision = "d3b8a6f04c21"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "strategy_performance_summaries",
+        sa.Column("strategy_id", sa.UUID(), nullable=False),
+        sa.Column("lifetime_pnl", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("total_trades", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["strategy_id"], ["strategies.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("strategy_id"),
+    )
+    # Backfill from the metrics already stored on each run.
+    if op.get_bind().dialect.name == "postgresql":
+        pnl = "CAST(result_metrics->>'pnl' AS DOUBLE PRECISION)"
+        trades = "CAST(result_metrics->>'trades' AS DOUBLE PRECISION)"
+    else:
+        pnl = "json_extract(result_metrics, '$.pnl')"
+        trades = "json_extract(result_metrics, '$.trades')"
+    op.execute(
+        sa.text(
+            "INSERT INTO strategy_performance_summaries (strategy_id, lifetime_pnl, total_trades, updated_at) "
+            f"SELECT strategy_id, COALESCE(SUM({pnl}), 0), CAST(COALESCE(SUM({trades}), 0) AS INTEGER), "
+            "CURRENT_TIMESTAMP FROM strategy_runs GROUP BY strategy_id"
+        )
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("strategy_performance_summaries")
@@ -0,0 +1,50 @@
+"""default strategy run and log timestamps server side
+
+Revision ID: f18c3b7d52e9
+Revises: e6a41f92b7d3
+Create Date: 2025-09-27 09:22:31
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "f18c3b7d52e9"
+down_revision = "e6a41f92b7d3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("strategy_runs") as batch_op:
+        batch_op.alter_column(
+            "started_at",
+            existing_type=sa.DateTime(timezone=True),
+            existing_nullable=False,
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+        )
+    with op.batch_alter_table("strategy_logs") as batch_op:
+        batch_op.alter_column(
+            "created_at",
+            existing_type=sa.DateTime(timezone=True),
+            existing_nullable=False,
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("strategy_logs") as batch_op:
+        batch_op.alter_column(
+            "created_at",
+            existing_type=sa.DateTime(timezone=True),
+            existing_nullable=False,
+            server_default=None,
+        )
+    with op.batch_alter_table("strategy_runs") as batch_op:
+        batch_op.alter_column(
+            "started_at",
+            existing_type=sa.DateTime(timezone=True),
+            existing_nullable=False,
+            server_default=None,
+        )
@@ -1,46 +1,16 @@
-﻿import json
-import sys
-from pathlib import Path
-
-backend_dir = Path(__file__).resolve().parents[1] / "backend"
-if str(backend_dir) not in sys.path:
-    sys.path.append(str(backend_dir))
-
-from fastapi.testclient import TestClient
-from app.main import app
+﻿"""Cover strategy CRUD and lifecycle calls.
 
-client = TestClient(app)
+The flow now lives in ``backend/tests/test_api_smoke.py`` and runs against an in-memory
+database through the shared pytest ``api_client`` fixture; this shim keeps the CLI entry point.
+"""
 
-strategy_payload = {
-    "name": "Opening Range Breakout",
-    "type": "built-in",
-    "params": {"window": 15, "symbol": "NIFTY"}
-}
-create_resp = client.post("/api/strategies", json=strategy_payload)
-print("Create strategy:", create_resp.status_code)
-strategy = create_resp.json()
-print(json.dumps(strategy, indent=2))
-
-strategy_id = strategy["id"]
+import sys
+from pathlib import Path
 
-start_resp = client.post(
-    f"/api/strategies/{strategy_id}/start",
-    json={"mode": "paper", "configuration": {"note": "phase1 smoke"}},
-)
-print("Start strategy:", start_resp.status_code)
-print(json.dumps(start_resp.json(), indent=2))
+import pytest
 
-logs_resp = client.get(f"/api/strategies/{strategy_id}/logs")
-print("Logs:", logs_resp.status_code)
-print(json.dumps(logs_resp.json(), indent=2))
+backend_dir = Path(__file__).resolve().parents[1] / "backend"
 
-stop_resp = client.post(
-    f"/api/strategies/{strategy_id}/stop",
-    json={"reason": "demo complete"},
-)
-print("Stop strategy:", stop_resp.status_code)
-print(json.dumps(stop_resp.json(), indent=2))
 
-perf_resp = client.get(f"/api/strategies/{strategy_id}/pnl")
-print("Performance:", perf_resp.status_code)
-print(json.dumps(perf_resp.json(), indent=2))
+if __name__ == "__main__":
+    sys.exit(pytest.main([str(backend_dir / "tests" / "test_api_smoke.py"), "-k", "test_phase1_strategy_lifecycle"]))
@@ -1,27 +1,16 @@
-﻿import sys
-from pathlib import Path
+﻿"""Hit health/status endpoints to ensure the backend boots.
 
-backend_dir = Path(__file__).resolve().parents[1] / "backend"
-if str(backend_dir) not in sys.path:
-    sys.path.append(str(backend_dir))
+The flow now lives in ``backend/tests/test_api_smoke.py`` and runs against an in-memory
+database through the shared pytest ``api_client`` fixture; this shim keeps the CLI entry point.
+"""
 
-from fastapi.testclient import TestClient
-from app.main import app
+import sys
+from pathlib import Path
 
+import pytest
 
-def main() -> None:
-    """Run a small smoke test against the FastAPI app. Only executed when the
-    script is run directly so pytest/import-time collection doesn't trigger
-    network/database access.
-    """
-    client = TestClient(app)
-    print("GET /api/auth/health ->", client.get("/api/auth/health").status_code)
-    print("GET /api/rms/status ->", client.get("/api/rms/status").status_code)
-    print(
-        "GET /api/analytics/dashboard ->",
-        client.get("/api/analytics/dashboard").status_code,
-    )
+backend_dir = Path(__file__).resolve().parents[1] / "backend"
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(pytest.main([str(backend_dir / "tests" / "test_api_smoke.py"), "-k", "test_status_endpoints_respond"]))
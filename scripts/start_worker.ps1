@@ -19,7 +19,7 @@ try {
     if (-not (Test-Path )) {
         throw "Celery executable not found at . Ensure dependencies are installed."
     }
-    &  '-A' 'app.celery_app' 'worker' '-l' 'info'
+    &  '-A' 'app.celery_app' 'worker' '-l' 'info' '-Q' 'strategy' '-O' 'fair'
 }
 finally {
     Pop-Location